@@ -3,10 +3,19 @@
 ##############################################
 
 import os
-from urllib.request import urlopen
-import copy
+from dsa5021.fetch import grabfile
+import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime as dt
+from dsa5021.verifdata import goodrows, getv, meane
+from dsa5021.colcache import loadverif
+from dsa5021.verifdata import siteinfo, splitname
+from dsa5021.reference import reference
+from dsa5021.skill import skilltable
+from dsa5021.rolling import rollingskill, groupskill
+from dsa5021.plots import skillbars, skillseries, scatter3, fplot
+from dsa5021.export import exportfigures
+from dsa5021.contingency import contingency, categorical
 
 utc = dt.utcfromtimestamp
 
@@ -14,8 +23,6 @@ utc = dt.utcfromtimestamp
 #
 ##############################################
 
-from IPython.core.display import display, HTML
-
 # Define the CSS styles
 custom_styles = """
 <style>
@@ -36,27 +43,27 @@ custom_styles = """
 </style>
 """
 
+
+def notebookstyle():
+    """apply the styles, but only when running inside IPython/Jupyter"""
+    try:
+        from IPython import get_ipython
+        from IPython.display import HTML, display
+    except ImportError:
+        return
+    if get_ipython() is not None:
+        display(HTML(custom_styles))
+
+
 # Apply the styles
-display(HTML(custom_styles))
+notebookstyle()
 
 ##############################################
 #
 ##############################################
 
 
-# for automatically downloading data files from http://dsa5021.net/data/, or other url
-def grabfile(urlfront, filename, filedir=""):  # filedir could be data/, for example"
-    urlpath = urlfront + filename
-    filepath = filedir + filename
-    if os.path.exists(filepath):
-        print(filepath, " already exists.  Delete it, if you want to overwrite.")
-        return
-    with urlopen(urlpath) as response:
-        body = response.read()
-    with open(filepath, "wb") as f:
-        f.write(body)
-    print("downloaded " + urlpath + " to " + filepath)
-    return
+# grabfile, for automatically downloading data files, is in dsa5021.fetch
 
 
 ##############################################
@@ -101,14 +108,9 @@ else:
 ##############################################
 
 # the filename contains information about the file you chose
-sitenum = infilename.split("_")[0]  # grabs sitenum from the filename you chose
-siteinfo = {
-    "31011": "CAIRNS AERO",
-    "12038": "KALGOORLIE-BOULDER AIRPORT",
-    "09021": "PERTH AIRPORT",
-}
+# to score every file at once, see: python -m dsa5021.batch
+sitenum, varname = splitname(infilename)  # grabs sitenum from the filename you chose
 sitename = siteinfo[sitenum]
-varname = infilename[len(sitenum) + 1 : -4]
 print("this is what you are studying:")
 print(sitenum)
 print(sitename)
@@ -143,35 +145,26 @@ print(fkeys)  # forecast lead times, f1= 1 day, f2= 2 day ...
 
 
 ##############################################
-# This script processes a dataset, creating a nested dictionary
-# (edictf) to store observations, climate, and forecast data
-# using UTC timestamps as keys.
+# This script loads the dataset into a VerifTable (edictf), which holds
+# the utc, ob, clim and forecast data as numpy columns.  "NA" becomes nan.
 ##############################################
 
-edictf = {}
-for line in lines[1:]:
-    components = line.strip().split()
-    timeob = int(components[0])
-    edictf[timeob] = {}
-
-    for i, colname in enumerate(colnames[1:], start=1):
-        value = components[i]
-        edictf[timeob][colname] = float(value) if value != "NA" else value
-
-ekeys = sorted(edictf.keys())
+edictf = loadverif(infilename)  # parses the csv, or reloads its binary copy
+ekeys = edictf.utc
 print(f"edictf has {len(ekeys)} keys")
 
 
-testkey = ekeys[100]
+testrow = 100
+testkey = ekeys[testrow]
 print(testkey)
 print(utc(testkey))  # utc converts epoch time to UTC time
-print(edictf[testkey])
+print({ka: edictf[ka][testrow] for ka in colnames[1:]})
 
 
 # Look at edictf
-for k in ekeys[:10]:
-    print(k)
-    print(edictf[k])
+for i in range(10):
+    print(ekeys[i])
+    print({ka: edictf[ka][i] for ka in colnames[1:]})
 
 """
 
@@ -194,22 +187,16 @@ hack = (
     False  # True will use substitute persistence forecasts instead of model forecasts
 )
 
-edictp = copy.deepcopy(edictf)  # ready to hack the forecast data
-for k in ekeys:
-    for f in fkeys:
-        n = int(f[1])
-        priortime = k - n * 86400  # for extracting prior ob
-        priorob = "NA"  # default is "Not Available"
-        if priortime in edictp:  # prior ob exists
-            priorob = edictp[priortime]["ob"]  # get prior ob
-        edictp[k][f] = priorob  # replace model forecast with prior ob
+# f1 is the ob from 1 day before, f2 from 2 days before ...
+# ob and clim are shared with edictf, not copied
+edictp = reference(edictf, "persistence")
 
 
 if hack:
-    edict = edictp  # point edict to hacked persistence forecast dictionary
+    edict = edictp  # point edict to hacked persistence forecast table
     forecast = "persistence"
 else:
-    edict = edictf  # point edict to original model forecast dictionary
+    edict = edictf  # point edict to original model forecast table
     forecast = "model"
 print("you are using:", forecast, "forecasts")
 
@@ -226,11 +213,8 @@ Note that `f7` is not necessarily needed in a study of `f1`.  But we choose to d
 There is a surprising amount of missing data.  I am not sure why.
 """
 
-gkeys = []  # gkeys are "good" keys
-for k in ekeys:
-    if "NA" in edict[k].values():
-        continue  # one or more NA, throw out key
-    gkeys.append(k)
+good = goodrows(edict)  # True where there is no NA in the row
+gkeys = ekeys[good]  # gkeys are "good" keys
 print(
     "number of keys =",
     len(ekeys),
@@ -239,24 +223,15 @@ print(
 )
 
 
-# extracts values from a list of lists
-# kk is the subset of keys of adict that you want to include
-# ka = ob, clim, or f1, ... , the key of the inner list
-# the values for ka are put sequentially into a list
-def getv(adict, kk, ka):
-    w = []  # empty list
-    for k in kk:
-        w.append(adict[k][ka])  # fill the list
-    return w
-
-
-# makes the lists oo, cc, ffs['f1'] ... will be used in plotting and assessment of skill
+# getv(edict, good, ka) extracts the column ka = ob, clim, or f1, ...
+# for the rows selected by good, as a numpy array
+# makes the arrays oo, cc, ffs['f1'] ... will be used in plotting and assessment of skill
 ffs = {}
-oo = getv(edict, gkeys, "ob")  # all the ob
-cc = getv(edict, gkeys, "clim")  # all the clim
-tdays = [(x - gkeys[0]) / 86400 for x in gkeys]  # elapsed days
+oo = getv(edict, good, "ob")  # all the ob
+cc = getv(edict, good, "clim")  # all the clim
+tdays = (gkeys - gkeys[0]) / 86400  # elapsed days
 for fk in fkeys:
-    ffs[fk] = getv(edict, gkeys, fk)  # all the f1, f2, ...
+    ffs[fk] = getv(edict, good, fk)  # all the f1, f2, ...
 
 
 """
@@ -278,18 +253,8 @@ plt.title("forecast type: " + forecast)
 plt.legend()  # <- notice last semi-colon to supress messages
 
 
-# assess numerical difference between two lists
-def meane(a, b):
-    assert len(a) == len(b)
-    sumsq = 0  # sum of square difference
-    suma = 0  # sum of absolute difference
-    z = zip(a, b)
-    for x, y in z:
-        sumsq += (x - y) ** 2
-        suma += abs(x - y)
-    n = len(a)
-    # return both 'root mean square error' and 'mean absolute error'
-    return (sumsq / n) ** 0.5, suma / n
+# meane(a, b) returns both 'root mean square error' and 'mean absolute error'
+# between two arrays
 
 
 # find the error for using climate to predict observation
@@ -302,134 +267,156 @@ rmsef1, maef1 = meane(oo, ffs["f1"])
 print("RMSE one-day forecast = ", rmsef1, "     MAE one-day forecast = ", maef1)
 
 
-skills = []  # for RMSE skill
-skilla = []  # for MAE skill
+# all the lead times are scored at once, on the gkeys days
+scores = skilltable(edict, common=True)
+skills = list(scores["rmse_skill"])  # for RMSE skill, for bar graph
+skilla = list(scores["mae_skill"])  # for MAE skill, for bar graph
 skilld = {"clim": 0.0}  # will be useful for plots
 print("forecast type:", forecast)
 print("using    RMSE climate = {:6.3}     MAE climate =  {:6.3}\n".format(rmsec, maec))
-print("forecast    RMSE    Skill    MAE    Skill")
-for fk in fkeys:
-    ff = ffs[fk]
-    rmsef, maef = meane(oo, ff)
-    sks = 1.0 - rmsef / rmsec
-    ska = 1.0 - maef / maec
-    outform = "{}        {:6.3}  {:6.3}  {:6.3}  {:6.3}"
-    outstring = outform.format(fk, rmsef, sks, maef, ska)
+print("forecast    RMSE    Skill    MAE    Skill    Bias    Corr")
+for j, fk in enumerate(fkeys):
+    outform = "{}        {:6.3}  {:6.3}  {:6.3}  {:6.3}  {:6.3}  {:6.3}"
+    outstring = outform.format(
+        fk,
+        scores["rmse"][j],
+        scores["rmse_skill"][j],
+        scores["mae"][j],
+        scores["mae_skill"][j],
+        scores["bias"][j],
+        scores["corr"][j],
+    )
     print(outstring)
-    skills.append(sks)  # skill using RMSE, for bar graph
-    skilla.append(ska)  # skill using MAE, for bar graph
-    skilld[fk] = sks  # RMSE skill in this dictionary, for scatter plot labels
+    skilld[fk] = skills[j]  # RMSE skill in this dictionary, for scatter plot labels
 
 
-plt.figure(figsize=(8, 4))
-plt.title(varname + ",  " + forecast + " RMSE Skill Score,  " + sitename)
 color = "blue"
 if hack:
     color = "red"
-plt.bar(fkeys, skills, color=color)  # note skills
-plt.text(0.0, 0.0, yourname, fontsize=48, alpha=0.1)
-plt.savefig("skillscoresRMSE" + forecast + ".png")
-
 
-plt.figure(figsize=(8, 4))
-plt.title(varname + ",  " + forecast + " MAE Skill Score,  " + sitename)
-plt.bar(fkeys, skilla, color=color)  # note skilla
-plt.text(0.0, 0.0, yourname, fontsize=48, alpha=0.1)
-plt.savefig("skillscoresMAE" + forecast + ".png")
+# The figures are made by worker processes, see dsa5021.export.
+# A figure whose data and labels have not changed since the last run is skipped.
+figjobs = []
+
+title = varname + ",  " + forecast + " RMSE Skill Score,  " + sitename
+outpng = "skillscoresRMSE" + forecast + ".png"
+figjobs.append(
+    (
+        skillbars,
+        outpng,
+        dict(
+            fkeys=fkeys,
+            skills=skills,
+            title=title,
+            outfile=outpng,
+            color=color,
+            signature=yourname,
+        ),
+    )
+)
 
+title = varname + ",  " + forecast + " MAE Skill Score,  " + sitename
+outpng = "skillscoresMAE" + forecast + ".png"
+figjobs.append(
+    (
+        skillbars,
+        outpng,
+        dict(
+            fkeys=fkeys,
+            skills=skilla,
+            title=title,
+            outfile=outpng,
+            color=color,
+            signature=yourname,
+        ),
+    )
+)
 
-# this format will be useful for some of the plots below
-skt = "skill score={: .2f}"
-skt.format(skilld["f1"])
 
+# skill changes with time: RMSE skill by season, and in a 30 day rolling window
+seasonal = groupskill(edict, by="season")
+title = varname + ",  " + forecast + " RMSE Skill Score by season,  " + sitename
+outpng = "skillscoresRMSE" + forecast + "_season.png"
+figjobs.append(
+    (
+        skillbars,
+        outpng,
+        dict(
+            fkeys=fkeys,
+            skills=seasonal["rmse_skill"],
+            title=title,
+            outfile=outpng,
+            signature=yourname,
+            groups=seasonal["groups"],
+        ),
+    )
+)
 
-fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(13, 4), facecolor="yellow")
-if "MAX" in varname:
-    tlo = 10
-    thi = 45
-else:
-    tlo = -5
-    thi = 30
-fsz = 18
-tcks = range(tlo, thi + 1, 5)
+rolled = rollingskill(edict, window=30)
+title = varname + "  30 day rolling RMSE skill  " + forecast + "  " + sitename
+outpng = infilename[:-4] + "_rolling_" + forecast + ".png"
+figjobs.append(
+    (
+        skillseries,
+        outpng,
+        dict(
+            utc=ekeys,
+            skills=rolled["rmse_skill"],
+            fkeys=fkeys,
+            title=title,
+            outfile=outpng,
+            signature=yourname,
+        ),
+    )
+)
 
-color = "blue"
-if hack:
-    color = "red"
 
-skt = "skill score= {: .2f}"
-
-title = skt.format(skilld["f1"])
-ax[0].set_xlim(tlo, thi)
-ax[0].set_ylim(tlo, thi)
-ax[0].plot(ffs["f1"], oo, ".", color=color)
-ax[0].set_xlabel("f1", fontsize=fsz)
-ax[0].set_ylabel("ob", fontsize=fsz)
-ax[0].set_xticks(tcks)
-ax[0].set_yticks(tcks)
-ax[0].set_title(title)
-ax[0].set_aspect("equal")
-
-title = skt.format(skilld["f7"])
-ax[1].set_xlim(tlo, thi)
-ax[1].set_ylim(tlo, thi)
-ax[1].plot(ffs["f7"], oo, ".", color=color)
-ax[1].set_xlabel("f7", fontsize=fsz)
-ax[1].set_xticks(tcks)
-ax[1].set_yticks(tcks)
-ax[1].set_title(title)
-ax[1].set_aspect("equal")
-
-title = skt.format(skilld["clim"])
-ax[2].set_xlim(tlo, thi)
-ax[2].set_ylim(tlo, thi)
-ax[2].plot(cc, oo, ".", color=color)
-ax[2].set_xlabel("clim", fontsize=fsz)
-ax[2].set_xticks(tcks)
-ax[2].set_yticks(tcks)
-ax[2].set_title(title)
-ax[2].set_aspect("equal")
-
-figtitle = varname + "  " + "forecast=" + forecast + "   " + sitename
-fig.text(0.5, 1, figtitle, ha="center", fontsize=fsz)
-fig.text(0.1, 0.5, yourname, fontsize=48, alpha=0.1)
-fig.text(0.90, 0.95, "n=" + repr(len(oo)))
-outpng = infilename[:-4] + "_" + "scatter" + "_" + forecast
-fig.savefig(outpng + ".png", bbox_inches="tight", facecolor="yellow", transparent=False)
-
-
-def fplot(tdays, oo, ff, lab, title):
-    rmse, mae = meane(oo, ff)
-    rootmeansq = "{:.3f}".format(rmse)
-    quick, simple = plt.subplots(figsize=(18, 3))
-    simple.plot(tdays, oo, ".g", lw=1, ms=3, zorder=1)
-    for i in range(0, len(tdays)):
-        if oo[i] > ff[i]:
-            segcol = "r"
-        else:
-            segcol = "b"
-        simple.plot(
-            (tdays[i], tdays[i]), (ff[i], oo[i]), segcol, linewidth="1.", zorder=0
-        )
-    simple.set_xticks(range(0, 360, 30))  # x tick marks every 30
-    simple.set_ylabel("degree C")
-    simple.set_xlabel("day")
-    simple.set_title(title, fontsize=22)
-    # bb    simple.text(.1,.2,'your name here!',fontsize=72, alpha=.1, transform = simple.transAxes)
-    simple.text(0.05, 0.8, "RMSE=" + rootmeansq, transform=simple.transAxes)
-    quick.savefig(lab + ".png", dpi=144)
+# ob against f1, f7 and climatology
+panels = [("f1", ffs["f1"], skilld["f1"]), ("f7", ffs["f7"], skilld["f7"])]
+panels.append(("clim", cc, skilld["clim"]))
+outpng = infilename[:-4] + "_" + "scatter" + "_" + forecast + ".png"
+figjobs.append(
+    (
+        scatter3,
+        outpng,
+        dict(
+            oo=oo,
+            panels=panels,
+            varname=varname,
+            forecast=forecast,
+            sitename=sitename,
+            outfile=outpng,
+            color=color,
+            signature=yourname,
+        ),
+    )
+)
 
 
+# fplot draws ob, and the error of the forecast ff for each day
 for thef in fkeys:
     outpng = infilename[:-4] + "_" + thef + "_" + forecast
     title = varname + "  ob vs. " + thef + "  " + forecast + "  " + sitename
     print(title, ffs[thef][:10])
-    fplot(tdays, oo, ffs[thef], outpng, title)
+    figjobs.append(
+        (
+            fplot,
+            outpng + ".png",
+            dict(tdays=tdays, oo=oo, ff=ffs[thef], lab=outpng, title=title),
+        )
+    )
 
 title = varname + "  ob vs. climate  " + sitename
 print(title, cc[:10])
 outpng = infilename[:-4] + "_clim"
-fplot(tdays, oo, cc, outpng, title)
+figjobs.append(
+    (fplot, outpng + ".png", dict(tdays=tdays, oo=oo, ff=cc, lab=outpng, title=title))
+)
+
+# guarded, so worker processes that import this script again do not render
+if __name__ == "__main__":
+    made = exportfigures(figjobs)
+    print("made", len(made), "of", len(figjobs), "figures, the others were up to date")
 
 
 """
@@ -437,20 +424,13 @@ fplot(tdays, oo, cc, outpng, title)
 STUDENT EXERCISES
 
 ## using the dictionary
-Here is what should a simple exercise to make sure you understand our `edictf`, which has dictionaries within the dictionary.  For file `09021_AIR_TEMP_MAX.csv`, how many `NA` are within are in `f1`, `f2` ... `f7`?
+Here is what should a simple exercise to make sure you understand our `edictf`, which holds a numpy column for each of `ob`, `clim`, `f1` ...  For file `09021_AIR_TEMP_MAX.csv`, how many `NA` are within are in `f1`, `f2` ... `f7`?
 Give your answer as a list of 7 integers.  Hint: `nas[-1]` is 32.
 
 """
 
 # STUDENTS: how many "NA"
-nas = [0, 0, 0, 0, 0, 0, 0]
-for k in edictf.keys():
-    for m in range(7):
-        forecast_key = f"f{m + 1}"  # Construct the forecast key (f1, f2, ..., f7)
-        if edictf[k][forecast_key] == "NA":  # Check if the value is "NA"
-            nas[m] += (
-                1  # Increment the respective counter1  # Increment the corresponding NA count if the value is "NA"
-            )
+nas = np.isnan(edictf.fcst).sum(axis=0).tolist()  # count the nan in f1, f2, ..., f7
 
 print(infilename)
 print("forecast type:", forecast)
@@ -471,24 +451,10 @@ forecast type: persistence
 
 # STUDENTS, calculate TP FP FN TN
 fn = "f1"  # choose the forecast, f1, f2, ...f7.
-ff = ffs[fn]
-TP = 0
-FP = 0
-FN = 0
-TN = 0
 dt = 5  # you choose temperature increment above climatological forecast
-for f, o, c in zip(ff, oo, cc):
-    print("f=", f, "  o=", o, "  c=", c)  # delete this after you understand
-    if f > (c + dt):
-        if o > (c + dt):
-            TP += 1
-        else:
-            FP += 1
-    else:
-        if o > (c + dt):
-            FN += 1
-        else:
-            TN += 1
+# the event is: temperature more than dt above climatology
+ct = contingency(oo, ffs[fn], cc, [dt])
+TP, FP, FN, TN = [ct[k][0, 0] for k in ("TP", "FP", "FN", "TN")]
 
 
 print(infilename)
@@ -503,3 +469,15 @@ print("FN=", FN, "   TN=", TN)
 weather event: temperature 5 C above climatology
 forecast type: model f1
 TP= 32    FP= 4"""
+
+
+##############################################
+# every lead f1 ... f7, for a sweep of thresholds dt
+##############################################
+
+dts = np.arange(-5.0, 10.1, 0.5)
+ctall = contingency(oo, np.column_stack([ffs[fk] for fk in fkeys]), cc, dts)
+cscores = categorical(ctall)
+print("forecast type:", forecast, "   Heidke skill score for dt =", dts[::4])
+for j, fk in enumerate(fkeys):
+    print(fk, " ".join("{:6.3f}".format(x) for x in cscores["HSS"][j, ::4]))
@@ -0,0 +1,61 @@
+"""reusable pieces of the DSA 5021 forecast verification notebooks"""
+
+# The names below can be imported straight from the package,
+#
+#   from dsa5021 import loadverif, skilltable, brierskill, fplot
+#
+# but each module is only imported the first time one of its names is used,
+# so "import dsa5021" stays cheap and never pulls in matplotlib unless a
+# plotting function is asked for.
+
+import importlib
+
+_exports = {
+    "verifdata": [
+        "VerifTable",
+        "siteinfo",
+        "splitname",
+        "readverif",
+        "writeverif",
+        "goodrows",
+        "getv",
+        "meane",
+    ],
+    "colcache": ["loadverif"],
+    "fetch": ["grabfile", "grabfiles"],
+    "reference": ["reference"],
+    "skill": ["skillscores", "skilltable"],
+    "rolling": ["rollingskill", "groupskill"],
+    "contingency": ["contingency", "contingencytable", "categorical"],
+    "probskill": ["probcounts", "brierscores", "brierskill"],
+    "roc": ["roc", "rocskill", "relativevalue"],
+    "bootstrap": ["skillci", "probci"],
+    "accum": ["SkillAccumulator"],
+    "batch": ["runbatch"],
+    "rawobs": ["dailyobs"],
+    "rawfcst": ["readforecasts"],
+    "qc": ["qcstation", "qcsites"],
+    "gridded": ["opengridded", "LazyCube"],
+    "climatology": ["Climatology"],
+    "regions": ["RegionIndex", "weightedmean"],
+    "pixels": ["plotpixels2", "renderframes"],
+    "movie": ["animate"],
+    "plots": ["skillbars", "skillseries", "fplot", "scatter3"],
+    "export": ["exportfigures"],
+}
+
+_where = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = sorted(_where)
+
+
+def __getattr__(name):
+    if name not in _where:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module("." + _where[name], __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,122 @@
+"""command line entry point: skill tables, and figures, for verification files"""
+
+# python -m dsa5021 dsa5021-main                  scores and skill bar charts
+# python -m dsa5021 dsa5021-main --scores-only    scores only, no matplotlib
+# python -m dsa5021 31011_DailyPoP1.csv 09021_AIR_TEMP_MAX.csv -o scores.txt
+#
+# Temperature files get the skill table of dsa5021.batch; PoP files, like
+# 31011_DailyPoP10.csv, get Brier score, BSS and AUC, with the rain
+# threshold (10 mm) taken from the file name.
+
+import os
+import re
+
+
+def raintrigger(varname):
+    """the rain threshold in mm of a PoP file: DailyPoP10 -> 10"""
+    m = re.search(r"PoP(\d+)$", varname)
+    return int(m.group(1)) if m else 1
+
+
+def findall(paths, varnames=None):
+    """verification files named on the command line, or found in directories"""
+    from .batch import findfiles
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += findfiles(path, varnames, layout=None)
+        else:
+            files.append(path)
+    return files
+
+
+def probrows(path):
+    """rows of site, var, lead, n, bs, bss, auc for a PoP file"""
+    from .colcache import loadverif
+    from .probskill import brierskill
+    from .roc import rocskill
+    from .verifdata import splitname
+
+    sitenum, varname = splitname(path)
+    table = loadverif(path)
+    trigger = raintrigger(varname)
+    scores = brierskill(table, trigger)
+    curves = rocskill(table, trigger)
+    return [
+        [sitenum, varname, fk, scores["n"][j], scores["bs"][j], scores["bss"][j]]
+        + [curves[j]["auc"]]
+        for j, fk in enumerate(table.fkeys)
+    ]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m dsa5021",
+        description="skill scores for <site>_<VAR>.csv verification files",
+    )
+    parser.add_argument("paths", nargs="*", default=["."], help="files or directories")
+    parser.add_argument("-o", "--outfile", help="write the skill table here too")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1, help="number of processes"
+    )
+    parser.add_argument("--vars", nargs="*", help="only these variables")
+    parser.add_argument(
+        "--forecasts",
+        nargs="*",
+        default=["model", "persistence"],
+        help="model and/or reference forecasts: persistence, damped, blend",
+    )
+    parser.add_argument(
+        "--scores-only", action="store_true", help="no figures, no matplotlib"
+    )
+    parser.add_argument("--figdir", default=".", help="where the figures go")
+    args = parser.parse_args(argv)
+
+    from .batch import columns, runbatch, tablelines, writetable
+    from .verifdata import layoutof
+
+    paths = findall(args.paths, args.vars)
+    if not paths:
+        parser.error("no <site>_<VAR>.csv files in " + " ".join(args.paths))
+    pop = [p for p in paths if layoutof(p) == "pop"]
+    temp = [p for p in paths if p not in pop]
+
+    rows = runbatch(temp, None, args.workers, tuple(args.forecasts)) if temp else []
+    if rows:
+        print("\n".join(tablelines(rows)))
+        if args.outfile:
+            writetable(rows, args.outfile)
+    prows = [row for path in pop for row in probrows(path)]
+    if prows:
+        print("site var lead n bs bss auc")
+        for row in prows:
+            print(" ".join(row[:3] + ["%d" % row[3]] + ["%.4f" % x for x in row[4:]]))
+    if args.scores_only or not rows:
+        return
+
+    from . import plots
+    from .export import exportfigures
+
+    jobs = []
+    for site, var, forecast in sorted(set(tuple(row[:3]) for row in rows)):
+        mine = [row for row in rows if tuple(row[:3]) == (site, var, forecast)]
+        for score in ["rmse_skill", "mae_skill"]:
+            outfile = os.path.join(
+                args.figdir, "%s_%s_%s_%s.png" % (site, var, score, forecast)
+            )
+            kwargs = dict(
+                fkeys=[row[3] for row in mine],
+                skills=[row[columns.index(score)] for row in mine],
+                title="%s %s %s %s" % (site, var, score, forecast),
+                outfile=outfile,
+            )
+            jobs.append((plots.skillbars, outfile, kwargs))
+    done = exportfigures(jobs, workers=args.workers, manifestdir=args.figdir)
+    print("figures:", len(done), "rendered,", len(jobs) - len(done), "up to date")
+
+
+if __name__ == "__main__":
+    main()
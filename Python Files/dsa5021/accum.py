@@ -0,0 +1,151 @@
+"""running skill statistics, updated one day at a time"""
+
+# RMSE, MAE and skill only need a few running sums for each lead time:
+#
+#   n      number of days scored
+#   se     sum of forecast minus ob
+#   se2    sum of (forecast minus ob)**2
+#   sae    sum of abs(forecast minus ob)
+#
+# plus sec, sec2, saec for climatology on the same days.  Appending new rows
+# adds to the sums, so a daily update costs only the new rows.  A day is
+# scored for a lead if ob, clim and that forecast are all present, so each
+# lead has its own set of days (common=False in dsa5021.skill).
+#
+# acc = SkillAccumulator.load("skillaccum.npz")  # or SkillAccumulator()
+# acc.append("09021", "AIR_TEMP_MAX", "model", table)  # or acc.appendfile(path)
+# acc.save("skillaccum.npz")
+# acc.scores("09021", "AIR_TEMP_MAX", "model")["rmse_skill"]
+#
+# PoP variables (DailyPoP1 ...) are refused: RMSE and MAE of 0/1 rain
+# outcomes are not their skill, see dsa5021.probskill for that.
+
+import os
+
+import numpy as np
+
+from .verifdata import layoutof, splitname
+from .colcache import loadverif
+from .reference import reference
+
+sums = ["n", "se", "se2", "sae", "sec", "sec2", "saec"]
+
+
+class SkillAccumulator:
+    """running sums for each (site, var, forecast), each an array over leads"""
+
+    def __init__(self):
+        self.stats = {}  # (site, var, forecast) -> {sum name: array over leads}
+        self.lastutc = {}  # (site, var, forecast) -> utc of the last row added
+        self.fkeys = {}  # (site, var, forecast) -> forecast keys
+
+    def keys(self):
+        return sorted(self.stats)
+
+    def append(self, site, var, forecast, table):
+        """add the rows of table newer than anything added before
+
+        Returns the number of rows added.  Rows already counted are skipped,
+        so appending the whole file again each day is safe, if wasteful.
+        A PoP variable raises ValueError.
+        """
+        if layoutof(var) != "temp":
+            raise ValueError(
+                "%s is a PoP variable, score it with dsa5021.probskill" % var
+            )
+        key = (site, var, forecast)
+        if key not in self.stats:
+            nlead = len(table.fkeys)
+            self.stats[key] = {s: np.zeros(nlead) for s in sums}
+            self.lastutc[key] = None
+            self.fkeys[key] = list(table.fkeys)
+        elif list(table.fkeys) != self.fkeys[key]:
+            raise ValueError("forecast keys changed for %s %s %s" % key)
+        new = slice(None)
+        if self.lastutc[key] is not None:
+            new = slice(
+                np.searchsorted(table.utc, self.lastutc[key], side="right"), None
+            )
+        utc = table.utc[new]
+        if len(utc) == 0:
+            return 0
+        ob = table.ob[new, None]
+        clim = table.clim[new, None]
+        fcst = table.fcst[new]
+        valid = ~np.isnan(fcst) & ~np.isnan(ob) & ~np.isnan(clim)
+        e = np.where(valid, fcst - ob, 0.0)
+        ec = np.where(valid, clim - ob, 0.0)
+        st = self.stats[key]
+        st["n"] += valid.sum(axis=0)
+        st["se"] += e.sum(axis=0)
+        st["se2"] += (e * e).sum(axis=0)
+        st["sae"] += np.abs(e).sum(axis=0)
+        st["sec"] += ec.sum(axis=0)
+        st["sec2"] += (ec * ec).sum(axis=0)
+        st["saec"] += np.abs(ec).sum(axis=0)
+        self.lastutc[key] = int(utc[-1])
+        return len(utc)
+
+    def appendfile(self, path, forecasts=("model", "persistence")):
+        """append the new rows of a <site>_<VAR>.csv file, for each forecast type"""
+        site, var = splitname(path)
+        table = loadverif(path)
+        added = 0
+        for forecast in forecasts:
+            if forecast == "model":
+                added += self.append(site, var, forecast, table)
+            else:
+                added += self.append(site, var, forecast, reference(table, forecast))
+        return added
+
+    def scores(self, site, var, forecast):
+        """n, rmse, mae, bias, rmse_skill, mae_skill, rmse_clim, mae_clim"""
+        st = self.stats[(site, var, forecast)]
+        n = st["n"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rmse = np.sqrt(st["se2"] / n)
+            mae = st["sae"] / n
+            rmsec = np.sqrt(st["sec2"] / n)
+            maec = st["saec"] / n
+            return {
+                "n": n.astype(np.int64),
+                "rmse": rmse,
+                "mae": mae,
+                "bias": st["se"] / n,
+                "rmse_skill": 1.0 - rmse / rmsec,
+                "mae_skill": 1.0 - mae / maec,
+                "rmse_clim": rmsec,
+                "mae_clim": maec,
+            }
+
+    def save(self, path):
+        """write everything to one .npz file, replacing it atomically"""
+        arrays = {}
+        for i, key in enumerate(self.keys()):
+            arrays["key%d" % i] = np.array(list(key) + self.fkeys[key])
+            arrays["last%d" % i] = np.array(
+                -1 if self.lastutc[key] is None else self.lastutc[key]
+            )
+            arrays["stats%d" % i] = np.array([self.stats[key][s] for s in sums])
+        tmppath = path + ".tmp"
+        with open(tmppath, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmppath, path)
+
+    @classmethod
+    def load(cls, path):
+        """read what save wrote, or start empty if path does not exist"""
+        acc = cls()
+        if not os.path.exists(path):
+            return acc
+        with np.load(path) as data:
+            i = 0
+            while "key%d" % i in data:
+                words = [str(w) for w in data["key%d" % i]]
+                key = tuple(words[:3])
+                last = int(data["last%d" % i])
+                acc.fkeys[key] = words[3:]
+                acc.lastutc[key] = None if last < 0 else last
+                acc.stats[key] = dict(zip(sums, data["stats%d" % i]))
+                i += 1
+        return acc
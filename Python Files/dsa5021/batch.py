@@ -0,0 +1,155 @@
+"""scores every <site>_<VAR>.csv verification file in a directory, in parallel"""
+
+# Each file is scored for the model forecasts and for persistence, and all
+# the results go into one table with a row per site, variable, forecast type
+# and lead time.  The files are spread over a pool of worker processes.
+#
+# python -m dsa5021.batch dsa5021-main -o skilltable.txt
+#
+# python -m dsa5021.batch data/ --vars AIR_TEMP_MAX AIR_TEMP_MIN -j 8
+#
+# RMSE and MAE mean nothing for PoP files (31011_DailyPoP1.csv), so they are
+# left out here; python -m dsa5021 gives them Brier scores and AUC instead.
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .verifdata import layoutof, siteinfo, splitname
+from .colcache import loadverif
+from .reference import reference
+from .skill import skilltable
+
+columns = [
+    "site",
+    "var",
+    "forecast",
+    "lead",
+    "n",
+    "rmse",
+    "mae",
+    "bias",
+    "corr",
+    "rmse_skill",
+    "mae_skill",
+    "rmse_clim",
+    "mae_clim",
+]
+
+
+def findfiles(datadir, varnames=None, layout="temp"):
+    """sorted paths of the <site>_<VAR>.csv files in datadir
+
+    Only files of layout ("temp" or "pop", see verifdata.layoutof), or all
+    of them if layout is None.
+    """
+    found = []
+    for path in sorted(glob.glob(os.path.join(datadir, "*_*.csv"))):
+        try:
+            sitenum, varname = splitname(path)
+        except ValueError:
+            continue  # some other csv file
+        if varnames and varname not in varnames:
+            continue
+        if layout is not None and layoutof(path) != layout:
+            continue
+        found.append(path)
+    return found
+
+
+def scorefile(path, forecasts=("model", "persistence"), common=True):
+    """rows of the skill table for one file, as lists in the order of columns"""
+    sitenum, varname = splitname(path)
+    if layoutof(path) != "temp":
+        raise ValueError(
+            "%s is a PoP file, score it with dsa5021.probskill.brierskill" % path
+        )
+    table = loadverif(path)
+    rows = []
+    for forecast in forecasts:
+        if forecast == "model":
+            scores = skilltable(table, common=common)
+        else:
+            scores = skilltable(reference(table, forecast), common=common)
+        for j, fk in enumerate(table.fkeys):
+            row = [sitenum, varname, forecast, fk]
+            row += [scores[c][j] for c in columns[4:]]
+            rows.append(row)
+    return rows
+
+
+def tablelines(rows):
+    """the lines of the skill table, whitespace separated columns"""
+    yield " ".join(columns)
+    for row in rows:
+        words = row[:4] + ["%d" % row[4]]
+        words += ["NA" if x != x else "%.4f" % x for x in row[5:]]
+        yield " ".join(words)
+
+
+def writetable(rows, outfile):
+    """write the skill table to outfile"""
+    with open(outfile, "w") as f:
+        for line in tablelines(rows):
+            f.write(line + "\n")
+
+
+def runbatch(paths, outfile=None, workers=None, forecasts=("model", "persistence")):
+    """score all paths, using workers processes, and return the rows
+
+    workers=None uses all the cores, workers=1 scores in this process.
+    If outfile is given, the consolidated table is written there.
+    """
+    rows = []
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            rows += scorefile(path, forecasts)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(scorefile, path, forecasts) for path in paths]
+            for job in jobs:
+                rows += job.result()
+    rows.sort(key=lambda row: row[:4])
+    if outfile:
+        writetable(rows, outfile)
+    return rows
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="skill table for all <site>_<VAR>.csv verification files"
+    )
+    parser.add_argument("datadir", nargs="?", default=".", help="where the files are")
+    parser.add_argument(
+        "-o", "--outfile", default="skilltable.txt", help="consolidated skill table"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="number of processes"
+    )
+    parser.add_argument("--vars", nargs="*", help="only these variables")
+    parser.add_argument(
+        "--forecasts",
+        nargs="*",
+        default=["model", "persistence"],
+        help="model and/or reference forecasts: persistence, damped, blend",
+    )
+    args = parser.parse_args(argv)
+
+    paths = findfiles(args.datadir, args.vars)
+    if not paths:
+        parser.error("no <site>_<VAR>.csv files in " + args.datadir)
+    rows = runbatch(paths, args.outfile, args.workers, tuple(args.forecasts))
+    sites = sorted(set(row[0] for row in rows))
+    print(
+        "scored",
+        len(paths),
+        "files from",
+        ", ".join(siteinfo.get(s, s) for s in sites),
+    )
+    print("written:", args.outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""benchmarks of the verification hot paths, on synthetic data of any size"""
+
+# Synthetic stations are written in the same formats as the real data: the
+# verification files (utc ob clim f1 ... f7, temperature and PoP), and the
+# raw hourly obs and forecast lines of the Australia study.  A size is
+# STATIONSxYEARS, from 1x1, one station-year, to 1000x10, a thousand
+# station-decades.  For each size every benchmark is timed (best of
+# --repeat runs), then run once more under tracemalloc for its peak memory.
+#
+# python -m dsa5021.bench --sizes 1x1 10x10 --save-baseline bench.json
+# python -m dsa5021.bench --sizes 1x1 10x10 --baseline bench.json
+#
+# The second run prints each time as a ratio to the saved one.  Memory-mapped
+# cache files (see dsa5021.colcache) are not counted by tracemalloc.
+
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from .verifdata import VerifTable, meane, readverif, writeverif
+from .colcache import loadverif
+from .reference import reference
+from .skill import skilltable
+from .probskill import brierskill
+from .roc import rocskill
+from .rawobs import dailyobs
+from .rawfcst import readforecasts
+
+DAY = 86400
+START = 1430431200  # 2015-04-30 22 UTC, like the first day of the real files
+fkeys = ["f%d" % n for n in range(1, 8)]
+
+
+def synthtemp(ndays, seed=0, start=START):
+    """VerifTable of daily max temperature: seasonal clim, ob with day to day
+    persistence, forecasts that get worse with lead, and some NA"""
+    rng = np.random.default_rng(seed)
+    utc = start + DAY * np.arange(ndays, dtype=np.int64)
+    doy = (utc // DAY) % 365
+    clim = np.round(25.0 + 7.0 * np.cos(2 * np.pi * (doy - 15) / 365.0), 1)
+    anom = np.zeros(ndays)
+    noise = rng.normal(0.0, 2.5, ndays)
+    for i in range(1, ndays):
+        anom[i] = 0.7 * anom[i - 1] + noise[i]
+    ob = np.round(clim + anom, 1)
+    spread = 1.0 + 0.5 * np.arange(7)
+    fcst = np.round(ob[:, None] + rng.normal(0.0, 1.0, (ndays, 7)) * spread, 1)
+    for n in range(7):
+        fcst[: n + 1, n] = np.nan  # no fn yet on the first days, as in the files
+    fcst[rng.random((ndays, 7)) < 0.02] = np.nan
+    ob[rng.random(ndays) < 0.01] = np.nan
+    return VerifTable(utc, ob, clim, fcst, fkeys)
+
+
+def synthpop(ndays, seed=0, start=START):
+    """VerifTable of daily rain (mm) with clim and forecast PoP in percent"""
+    rng = np.random.default_rng(seed)
+    utc = start + DAY * np.arange(ndays, dtype=np.int64)
+    doy = (utc // DAY) % 365
+    clim = np.round(40.0 + 30.0 * np.cos(2 * np.pi * (doy - 30) / 365.0))
+    wet = rng.normal(0.0, 1.0, ndays)
+    chance = 1.0 / (1.0 + np.exp(-(wet + np.log(clim / (100.0 - clim)))))
+    rain = rng.random(ndays) < chance
+    ob = np.where(rain, np.round(rng.gamma(0.8, 8.0, ndays), 1), 0.0)
+    skill = 1.0 / (1.0 + 0.4 * np.arange(7))
+    z = wet[:, None] * skill + rng.normal(0.0, 1.0, (ndays, 7)) * (1.0 - skill)
+    fcst = np.round(
+        100.0 / (1.0 + np.exp(-(z + np.log(clim / (100.0 - clim))[:, None])))
+    )
+    fcst[rng.random((ndays, 7)) < 0.02] = np.nan
+    return VerifTable(utc, ob, clim, fcst, fkeys)
+
+
+def synthraw(ndays, seed=0, site="99999", start=START - 22 * 3600):
+    """(obs lines, fcst lines) in the raw Australia study format"""
+    rng = np.random.default_rng(seed)
+    nhour = 24 * ndays
+    t = start + 3600 * np.arange(nhour, dtype=np.int64)
+    hourofday = np.arange(nhour) % 24
+    temp = 20.0 + 8.0 * np.sin(2 * np.pi * (hourofday - 3) / 24.0)
+    temp = np.round(temp + np.cumsum(rng.normal(0, 0.3, nhour)) * 0.1, 1)
+    rain = np.where(
+        rng.random(nhour) < 0.05, np.round(rng.gamma(0.6, 2.0, nhour), 1), 0.0
+    )
+    obs = []
+    for par, values, stat in [
+        ("AIR_TEMP_MAX", temp + 0.3, "max"),
+        ("AIR_TEMP_MIN", temp - 0.3, "min"),
+        ("PRCP", rain, "total"),
+    ]:
+        obs += [
+            "%s,%s,%s,%d,%d,%.1f,C,%s,false\n"
+            % (site, "SYNTH", par, v, v + 3600, x, stat)
+            for v, x in zip(t.tolist(), values.tolist())
+        ]
+    values = rng.integers(0, 40, (ndays, 3, 7)).tolist()
+    fcst = []
+    for d in range(ndays):
+        bt = start - start % DAY + d * DAY
+        for p, (par, hour, span) in enumerate(
+            [("MaxT", 22, 15), ("MinT", 10, 15), ("DailyPoP1", 15, 24)]
+        ):
+            for n in range(7):
+                vs = bt + (hour + 24 * n) * 3600
+                fcst.append(
+                    "%s,%s,%s,%d,%d,%d,C,x,false,%d\n"
+                    % (
+                        site,
+                        "SYNTH",
+                        par,
+                        vs,
+                        vs + span * 3600,
+                        values[d][p][n],
+                        bt,
+                    )
+                )
+    return obs, fcst
+
+
+def parsesize(size):
+    stations, years = size.lower().split("x")
+    return int(stations), int(years)
+
+
+def makefiles(workdir, stations, years):
+    """write the synthetic files for a size, once, and return their paths"""
+    sizedir = os.path.join(workdir, "%dx%d" % (stations, years))
+    if not os.path.isdir(sizedir):
+        os.makedirs(sizedir + ".tmp", exist_ok=True)
+        for s in range(stations):
+            site = "%05d" % s
+            writeverif(
+                os.path.join(sizedir + ".tmp", site + "_AIR_TEMP_MAX.csv"),
+                synthtemp(365 * years, seed=s),
+            )
+            writeverif(
+                os.path.join(sizedir + ".tmp", site + "_DailyPoP1.csv"),
+                synthpop(365 * years, seed=s),
+            )
+        os.rename(sizedir + ".tmp", sizedir)
+    temp = sorted(glob.glob(os.path.join(sizedir, "*_AIR_TEMP_MAX.csv")))
+    pop = sorted(glob.glob(os.path.join(sizedir, "*_DailyPoP1.csv")))
+    return temp, pop
+
+
+def _janim():
+    """janim from dsa5021-main, next to "Python Files", or None"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    maindir = os.path.join(here, os.pardir, os.pardir, "dsa5021-main")
+    if maindir not in sys.path and os.path.exists(os.path.join(maindir, "janim.py")):
+        sys.path.append(maindir)
+    try:
+        import janim
+    except ImportError:
+        return None
+    return janim
+
+
+def benchmarks(workdir, stations, years, rawstations=10, only=None):
+    """list of (name, function, number of items it processes, unit)"""
+    temp, pop = makefiles(workdir, stations, years)
+    ndays = 365 * years
+    for path in temp + pop:
+        loadverif(path)  # warm the binary cache
+    tables = [loadverif(path) for path in temp]
+    poptables = [loadverif(path) for path in pop]
+    nraw = min(stations, rawstations)
+    if only and "rawobs" not in only:
+        nraw = 0  # the raw lines are slow to make, so only when wanted
+    raw = [synthraw(ndays, seed=s) for s in range(nraw)]
+    out = os.path.join(workdir, "out")
+    os.makedirs(out, exist_ok=True)
+
+    def parse():
+        for path in temp:
+            readverif(path)
+
+    def cached():
+        for path in temp:
+            loadverif(path)
+
+    def persistence():
+        for table in tables:
+            reference(table, "persistence")
+
+    def skill():
+        for table in tables:
+            skilltable(table)
+            good = ~np.isnan(table.ob) & ~np.isnan(table["f1"])
+            meane(table.ob[good], table["f1"][good])
+
+    def brierroc():
+        for table in poptables:
+            brierskill(table, 1)
+            rocskill(table, 1)
+
+    def rawobs():
+        for obs, fcst in raw:
+            dict(dailyobs(obs, "AIR_TEMP_MAX", spanx=15, starth=22))
+            readforecasts(fcst, ["MaxT", "MinT", "DailyPoP1"])
+
+    def fplot():
+        import matplotlib.pyplot as plt
+
+        from .export import _offscreen
+        from .plots import fplot as plot
+
+        t = tables[0]
+        with _offscreen():
+            plot(t.utc / DAY, t.ob, t["f1"], os.path.join(out, "fplot"), "fplot")
+            plt.close("all")
+
+    nframes = min(12 * years, 120)  # months of a (time, lat, lon) SST cube
+    rng = np.random.default_rng(0)
+    cube = 270.0 + 35.0 * rng.random((nframes, 90, 180))
+    lon1d = 1.0 + 2.0 * np.arange(180)
+    lat1d = -89.0 + 2.0 * np.arange(90)
+
+    def drawframes(workers=1):
+        from .pixels import renderframes
+
+        frameout = os.path.join(out, "frames")
+        renderframes(lon1d, lat1d, cube, frameout, workers=workers, lowc=270, hic=305)
+
+    nrows = stations * ndays
+    benches = [
+        ("parse", parse, nrows, "rows"),
+        ("cached", cached, nrows, "rows"),
+        ("persistence", persistence, nrows, "rows"),
+        ("skill", skill, nrows, "rows"),
+        ("brier_roc", brierroc, nrows, "rows"),
+        ("rawobs", rawobs, nraw * ndays * 24 * 3, "lines"),
+        ("fplot", fplot, ndays, "days"),
+        ("frames", drawframes, nframes, "frames"),
+        ("frames_parallel", lambda: drawframes(None), nframes, "frames"),
+    ]
+    janim = _janim()
+    if janim is not None:
+        frames = [
+            "sstpngs/frame%05d.png" % i
+            for i in range(min(12 * stations * years, 12000))
+        ]
+
+        def makeanim():
+            janim.makeanim(list(frames), outfile=os.path.join(out, "anim.html"))
+
+        benches.append(("makeanim", makeanim, len(frames), "frames"))
+    return benches
+
+
+def measure(func, repeat=3):
+    """best time of repeat runs, and peak traced memory of one more, in MB"""
+    best = float("inf")
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def runbench(sizes, workdir, repeat=3, only=None, rawstations=10):
+    """{"SIZE/name": {"seconds", "per_second", "unit", "peak_mb"}}"""
+    results = {}
+    for size in sizes:
+        stations, years = parsesize(size)
+        for name, func, nitems, unit in benchmarks(
+            workdir, stations, years, rawstations, only
+        ):
+            if only and name not in only:
+                continue
+            seconds, peak = measure(func, repeat)
+            results["%s/%s" % (size, name)] = {
+                "seconds": seconds,
+                "per_second": nitems / seconds if seconds > 0 else float("inf"),
+                "unit": unit,
+                "peak_mb": peak,
+            }
+    return results
+
+
+def report(results, baseline=None, slower=1.25):
+    """print the results, with the ratio to the baseline time if there is one"""
+    print(
+        "%-22s %10s %16s %9s %s"
+        % (
+            "benchmark",
+            "seconds",
+            "throughput",
+            "peak MB",
+            "vs baseline" if baseline else "",
+        )
+    )
+    for key, r in results.items():
+        line = "%-22s %10.4f %10.3g %-5s %9.1f" % (
+            key,
+            r["seconds"],
+            r["per_second"],
+            r["unit"] + "/s",
+            r["peak_mb"],
+        )
+        if baseline and key in baseline:
+            ratio = r["seconds"] / baseline[key]["seconds"]
+            line += " %6.2fx%s" % (ratio, "  SLOWER" if ratio > slower else "")
+        print(line)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="benchmark the verification hot paths")
+    parser.add_argument(
+        "--sizes",
+        nargs="*",
+        default=["1x1", "10x10"],
+        help="STATIONSxYEARS, up to 1000x10",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="time the best of this many runs"
+    )
+    parser.add_argument("--only", nargs="*", help="only these benchmarks")
+    parser.add_argument(
+        "--rawstations",
+        type=int,
+        default=10,
+        help="most stations for the raw line benchmark",
+    )
+    parser.add_argument(
+        "--workdir",
+        help="keep the synthetic files here (default: a temporary directory)",
+    )
+    parser.add_argument(
+        "--baseline", help="compare with the results saved in this file"
+    )
+    parser.add_argument("--save-baseline", help="save the results to this file")
+    parser.add_argument(
+        "--slower",
+        type=float,
+        default=1.25,
+        help="flag times more than this many times the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="dsa5021bench")
+    try:
+        results = runbench(
+            args.sizes, workdir, args.repeat, args.only, args.rawstations
+        )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline, args.slower)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print("written:", args.save_baseline)
+
+
+if __name__ == "__main__":
+    main()
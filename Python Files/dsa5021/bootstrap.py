@@ -0,0 +1,199 @@
+"""block bootstrap confidence intervals for the skill scores, seeded and parallel"""
+
+# Every score here is made from sums over days: squared and absolute errors
+# for the RMSE and MAE skill (see dsa5021.skill), squared errors and PoP
+# category counts for the BSS and AUC (see dsa5021.probskill and roc).
+# So each day is turned into a row of these quantities once, and a
+# bootstrap replicate is just a weighted sum of the rows, the weights being
+# how many times the replicate drew each day.  A batch of replicates is an
+# (nrep, ndays) index matrix of moving blocks of days, its counts, and one
+# matrix product.  The blocks keep the day-to-day correlation of the errors.
+#
+# The replicates are made in chunks, each with its own child of one
+# np.random.SeedSequence, so the result depends on the seed but not on how
+# many worker processes share the chunks.
+#
+# ci = skillci(table, nrep=2000, seed=5021)
+# ci["rmse_skill_lo"], ci["rmse_skill_hi"]     # 95% interval for each lead
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .probskill import COMMON, NCAT, popcategory
+from .skill import validmask
+
+CHUNK = 250  # replicates per task
+
+
+def blockindex(rng, ndays, nrep, block=7):
+    """(nrep, ndays) day indices, made of moving blocks of block days"""
+    block = max(1, min(block, ndays))
+    nblock = -(-ndays // block)
+    starts = rng.integers(0, ndays - block + 1, size=(nrep, nblock))
+    index = starts[:, :, None] + np.arange(block)[None, None, :]
+    return index.reshape(nrep, -1)[:, :ndays]
+
+
+def drawcounts(index, ndays):
+    """(nrep, ndays) number of times each replicate drew each day"""
+    nrep = index.shape[0]
+    offset = np.arange(nrep)[:, None] * ndays
+    return np.bincount((index + offset).ravel(), minlength=nrep * ndays).reshape(
+        nrep, ndays
+    )
+
+
+def skillrows(ob, fcst, clim, mask=None, common=True):
+    """(N, 5, L) per day: scored, squared and absolute error of fcst and clim"""
+    ob = np.asarray(ob, dtype=np.float64)
+    clim = np.asarray(clim, dtype=np.float64)
+    fcst = np.asarray(fcst, dtype=np.float64)
+    if fcst.ndim == 1:
+        fcst = fcst[:, None]
+    valid = validmask(ob, fcst, clim, mask=mask, common=common)
+    e = np.where(valid, fcst - ob[:, None], 0.0)
+    ec = np.where(valid, (clim - ob)[:, None], 0.0)
+    return np.stack(
+        [valid.astype(np.float64), e * e, np.abs(e), ec * ec, np.abs(ec)], 1
+    )
+
+
+def skillfinish(sums):
+    """scores from (..., 5, L) sums of skillrows"""
+    n, e2, ae, ec2, aec = np.moveaxis(sums, -2, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rmse = np.sqrt(e2 / n)
+        mae = ae / n
+        return {
+            "rmse": rmse,
+            "mae": mae,
+            "rmse_skill": 1.0 - rmse / np.sqrt(ec2 / n),
+            "mae_skill": 1.0 - mae / (aec / n),
+        }
+
+
+def probrows(ob, prob, clim, raintrigger=1, mask=None, common=COMMON):
+    """(N, 3 + 2*NCAT, L) per day: scored, squared error of prob and clim,
+    and one-hot PoP category of the forecast, and of it when it rained"""
+    ob = np.asarray(ob, dtype=np.float64)
+    clim = np.asarray(clim, dtype=np.float64)
+    prob = np.asarray(prob, dtype=np.float64)
+    if prob.ndim == 1:
+        prob = prob[:, None]
+    valid = validmask(ob, prob, clim, mask=mask, common=common)
+    rained = (ob >= raintrigger).astype(np.float64)[:, None]
+    p = np.where(valid, prob, 0.0)
+    c = np.where(valid, clim[:, None], 0.0)
+    w = valid.astype(np.float64)
+    onehot = (popcategory(p)[:, None, :] == np.arange(NCAT)[None, :, None]) * w[:, None]
+    return np.concatenate(
+        [
+            w[:, None],
+            (w * (rained - p) ** 2)[:, None],
+            (w * (rained - c) ** 2)[:, None],
+            onehot,
+            onehot * rained[:, None],
+        ],
+        axis=1,
+    )
+
+
+def probfinish(sums):
+    """scores from (..., 3 + 2*NCAT, L) sums of probrows"""
+    sums = np.moveaxis(sums, -2, 0)
+    n, sqerr, sqerrc = sums[:3]
+    count = sums[3 : 3 + NCAT]
+    hits = sums[3 + NCAT :]
+    # forecasts and rain events above each threshold, the first being -0.001
+    above = count.sum(axis=0) - np.concatenate(
+        [np.zeros_like(n)[None], np.cumsum(count, 0)]
+    )
+    hitsabove = hits.sum(axis=0) - np.concatenate(
+        [np.zeros_like(n)[None], np.cumsum(hits, 0)]
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hitrate = hitsabove / hitsabove[0]
+        farate = (above - hitsabove) / (above[0] - hitsabove[0])
+        # empty categories repeat a point, which adds no area
+        auc = -0.5 * np.sum((hitrate[1:] + hitrate[:-1]) * np.diff(farate, axis=0), 0)
+        bs = sqerr / n
+        return {"bs": bs, "bss": 1.0 - bs / (sqerrc / n), "auc": auc}
+
+
+def _replicates(rows, finish, seed, nrep, block):
+    rng = np.random.default_rng(seed)
+    ndays = rows.shape[0]
+    weights = drawcounts(blockindex(rng, ndays, nrep, block), ndays)
+    sums = (weights @ rows.reshape(ndays, -1)).reshape((nrep,) + rows.shape[1:])
+    return finish(sums)
+
+
+def bootstrap(rows, finish, nrep=1000, block=7, seed=0, workers=None):
+    """nrep replicates of the scores: {metric: (nrep, L) array}
+
+    rows and finish are skillrows and skillfinish, or probrows and
+    probfinish.  workers=None uses all the cores, workers=1 this process.
+    """
+    chunks = [min(CHUNK, nrep - i) for i in range(0, nrep, CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    if workers == 1 or len(chunks) == 1:
+        parts = [_replicates(rows, finish, s, m, block) for s, m in zip(seeds, chunks)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [
+                pool.submit(_replicates, rows, finish, s, m, block)
+                for s, m in zip(seeds, chunks)
+            ]
+            parts = [job.result() for job in jobs]
+    return {k: np.concatenate([part[k] for part in parts]) for k in parts[0]}
+
+
+def intervals(rows, finish, nrep=1000, block=7, seed=0, ci=0.95, workers=None):
+    """scores and their percentile intervals, for every lead
+
+    For each metric m, m is the score from all the days, m_lo and m_hi the
+    ends of the ci interval from the bootstrap replicates.
+    """
+    estimate = finish(rows.sum(axis=0))
+    reps = bootstrap(rows, finish, nrep, block, seed, workers)
+    q = 100.0 * np.array([(1.0 - ci) / 2.0, (1.0 + ci) / 2.0])
+    out = {}
+    for k in estimate:
+        out[k] = estimate[k]
+        out[k + "_lo"], out[k + "_hi"] = np.nanpercentile(reps[k], q, axis=0)
+    return out
+
+
+def skillci(
+    table, nrep=1000, block=7, seed=0, ci=0.95, mask=None, common=True, workers=None
+):
+    """intervals of rmse, mae, rmse_skill, mae_skill for every lead of a VerifTable"""
+    rows = skillrows(table.ob, table.fcst, table.clim, mask=mask, common=common)
+    return intervals(rows, skillfinish, nrep, block, seed, ci, workers)
+
+
+def probci(
+    table,
+    raintrigger=1,
+    nrep=1000,
+    block=7,
+    seed=0,
+    ci=0.95,
+    mask=None,
+    common=COMMON,
+    workers=None,
+):
+    """intervals of bs, bss, auc for every lead of a PoP VerifTable (in percent)
+
+    The days scored are those of dsa5021.probskill.brierskill.
+    """
+    rows = probrows(
+        table.ob,
+        table.fcst / 100.0,
+        table.clim / 100.0,
+        raintrigger=raintrigger,
+        mask=mask,
+        common=common,
+    )
+    return intervals(rows, probfinish, nrep, block, seed, ci, workers)
@@ -0,0 +1,152 @@
+"""monthly climatology and anomalies of a gridded record, in one pass over time"""
+
+# GriddedSSTData.ipynb makes the climatology of two years of tos as
+# 0.5*(sst[0:12]+sst[12:]) and subtracts it from a float64 copy of sst.
+# Here each calendar month keeps running (Welford) statistics at every grid
+# point, for any number of years:
+#
+#   n      number of unmasked values
+#   mean   running mean
+#   m2     running sum of squared differences from the mean
+#   min, max
+#
+# updated a chunk of time steps at a time from a dsa5021.gridded.LazyCube,
+# so the record is never all in memory.  Anomalies are a lazy cube too,
+# computed from the file as they are read:
+#
+# g = opengridded("tos_O1_2001-2002.nc")
+# clim = Climatology.fromcube(g.cube)              # time 0 is January
+# clim.mean[0]                                      # January climatology
+# clim.seasonal("JFM"), clim.annualmean(), clim.annualrange()
+# anomaly = clim.anomaly(g.cube)
+# anomaly[:, 75:85, :].mean(1)                      # 5S-5N band, by month
+# clim.standardized(g.cube)[:, 110, 85]
+
+import numpy as np
+
+from .gridded import LazyCube
+
+seasons = {
+    "DJF": [11, 0, 1],
+    "JFM": [0, 1, 2],
+    "MAM": [2, 3, 4],
+    "AMJ": [3, 4, 5],
+    "JJA": [5, 6, 7],
+    "JAS": [6, 7, 8],
+    "SON": [8, 9, 10],
+    "OND": [9, 10, 11],
+}
+
+
+class Climatology:
+    """running statistics for each calendar month, each a (12, lat, lon) array"""
+
+    def __init__(self, shape, firstmonth=0):
+        self.firstmonth = firstmonth  # calendar month (0 is January) of time 0
+        self.ntime = 0  # time steps added so far
+        self.n = np.zeros((12,) + tuple(shape), dtype=np.int64)
+        self._mean = np.zeros(self.n.shape)
+        self.m2 = np.zeros(self.n.shape)
+        self._min = np.full(self.n.shape, np.inf)
+        self._max = np.full(self.n.shape, -np.inf)
+
+    @classmethod
+    def fromcube(cls, cube, firstmonth=0, chunk=None):
+        """the climatology of a (time, ...) LazyCube, read chunk by chunk"""
+        clim = cls(cube.shape[1:], firstmonth)
+        for start, block in cube.blocks(chunk):
+            clim.add(block)
+        return clim
+
+    def add(self, block):
+        """add the next time steps, a (t, ...) array, masked where missing"""
+        block = np.ma.asarray(block, dtype=np.float64)
+        if block.shape[1:] != self.n.shape[1:]:
+            raise ValueError(
+                "block %s does not fit the grid %s" % (block.shape, self.n.shape[1:])
+            )
+        values = block.filled(0.0)
+        valid = ~np.ma.getmaskarray(block)
+        for x, ok in zip(values, valid):
+            m = (self.firstmonth + self.ntime) % 12
+            self.ntime += 1
+            n = self.n[m] + ok
+            delta = np.where(ok, x - self._mean[m], 0.0)
+            self._mean[m] += delta / np.maximum(n, 1)
+            self.m2[m] += delta * np.where(ok, x - self._mean[m], 0.0)
+            self._min[m] = np.where(ok, np.minimum(self._min[m], x), self._min[m])
+            self._max[m] = np.where(ok, np.maximum(self._max[m], x), self._max[m])
+            self.n[m] = n
+
+    def _masked(self, a):
+        return np.ma.masked_where(self.n == 0, a)
+
+    @property
+    def mean(self):
+        return self._masked(self._mean)
+
+    @property
+    def min(self):
+        return self._masked(self._min)
+
+    @property
+    def max(self):
+        return self._masked(self._max)
+
+    def std(self, ddof=1):
+        """standard deviation of each month, masked with fewer than ddof+1 years"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = self.m2 / (self.n - ddof)
+        return np.ma.masked_where(self.n <= ddof, np.sqrt(np.maximum(var, 0.0)))
+
+    def seasonal(self, months):
+        """mean of the monthly means over a season, "JFM" or a list like [0, 1, 2]"""
+        if isinstance(months, str):
+            months = seasons[months]
+        return self.mean[list(months)].mean(0)
+
+    def annualmean(self):
+        return self.mean.mean(0)
+
+    def annualrange(self):
+        """warmest minus coldest monthly mean"""
+        return self.mean.max(0) - self.mean.min(0)
+
+    def anomaly(self, cube):
+        """lazy cube of cube minus the climatology of its calendar month
+
+        cube is a LazyCube, or a view of one, whose source has time first
+        and starts in firstmonth.
+        """
+        source = AnomalySource(cube.source, self.mean, self.firstmonth)
+        return LazyCube(source, cube.select, cube.chunk)
+
+    def standardized(self, cube, ddof=1):
+        """lazy cube of anomalies divided by the standard deviation of the month"""
+        std = self.std(ddof)
+        scale = np.ma.masked_where(std == 0, std)
+        source = AnomalySource(cube.source, self.mean, self.firstmonth, scale)
+        return LazyCube(source, cube.select, cube.chunk)
+
+
+class AnomalySource:
+    """source minus a monthly (12, ...) climatology, worked out when indexed"""
+
+    dtype = np.dtype(np.float64)
+
+    def __init__(self, source, climate, firstmonth=0, scale=None):
+        self.source = source
+        self.shape = tuple(source.shape)
+        self.climate = climate
+        self.firstmonth = firstmonth
+        self.scale = scale
+
+    def __getitem__(self, key):
+        data = np.ma.asarray(self.source[key], dtype=np.float64)
+        months = (self.firstmonth + np.arange(self.shape[0])[key[0]]) % 12
+        # months leads the index, so its axis stays first
+        where = (months,) + tuple(key[1:])
+        data = data - self.climate[where]
+        if self.scale is not None:
+            data = data / self.scale[where]
+        return data
@@ -0,0 +1,130 @@
+"""binary copies of the verification files, memory-mapped on reload"""
+
+# Parsing the text of a verification file every run is slow when there are
+# hundreds of them.  The first time 09021_AIR_TEMP_MAX.csv is loaded, its
+# columns are also saved next to it as .npy files:
+#
+#   09021_AIR_TEMP_MAX.cols/utc.npy    int64
+#   09021_AIR_TEMP_MAX.cols/ob.npy     float64
+#   09021_AIR_TEMP_MAX.cols/clim.npy   float64
+#   09021_AIR_TEMP_MAX.cols/fcst.npy   float64, (N, 7)
+#   09021_AIR_TEMP_MAX.cols/meta.json  forecast keys, utcsep, and the csv size,
+#                                      mtime, sha1
+#
+# Later loads memory-map the .npy files, read only, without copying.  The
+# cache is rebuilt if the csv changes size, or changes mtime and sha1.
+# meta.json is written last, so a half written cache is never used.
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .verifdata import VerifTable, readverif
+
+VERSION = 2  # change this if the layout of the cache changes
+columns = ["utc", "ob", "clim", "fcst"]
+
+
+def cachedir(csvpath):
+    stem = csvpath[:-4] if csvpath.endswith(".csv") else csvpath
+    return stem + ".cols"
+
+
+def sha1file(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source(csvpath, digest=None):
+    st = os.stat(csvpath)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": digest or sha1file(csvpath),
+    }
+
+
+def _writemeta(cdir, meta):
+    metapath = os.path.join(cdir, "meta.json")
+    with open(metapath + ".tmp", "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(metapath + ".tmp", metapath)
+
+
+def writecache(csvpath, table=None):
+    """save the columns of csvpath (or of table, read from it) next to it"""
+    if table is None:
+        table = readverif(csvpath)
+    cdir = cachedir(csvpath)
+    os.makedirs(cdir, exist_ok=True)
+    metapath = os.path.join(cdir, "meta.json")
+    if os.path.exists(metapath):
+        os.remove(metapath)  # the cache is not valid until meta.json is back
+    for name in columns:
+        path = os.path.join(cdir, name + ".npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(getattr(table, name)))
+        os.replace(path + ".tmp", path)
+    meta = {
+        "version": VERSION,
+        "fkeys": table.fkeys,
+        "utcsep": table.utcsep,
+        "source": _source(csvpath),
+    }
+    _writemeta(cdir, meta)
+    return cdir
+
+
+def readcache(csvpath):
+    """the cached VerifTable, memory-mapped, or None if it is missing or stale"""
+    cdir = cachedir(csvpath)
+    try:
+        with open(os.path.join(cdir, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != VERSION:
+        return None
+    src = meta["source"]
+    st = os.stat(csvpath)
+    if st.st_size != src["size"]:
+        return None
+    if st.st_mtime_ns != src["mtime_ns"]:
+        # touched, maybe rewritten: trust the cache only if the content is the same
+        digest = sha1file(csvpath)
+        if digest != src["sha1"]:
+            return None
+        meta["source"] = _source(csvpath, digest)
+        try:
+            _writemeta(cdir, meta)
+        except OSError:
+            pass  # a read-only cache still reads; the check is made again
+    arrays = {
+        name: np.load(os.path.join(cdir, name + ".npy"), mmap_mode="r")
+        for name in columns
+    }
+    return VerifTable(fkeys=meta["fkeys"], utcsep=meta["utcsep"], **arrays)
+
+
+def loadverif(csvpath, cache=True):
+    """readverif, but through the binary cache next to csvpath
+
+    With cache=False this is just readverif.  If the cache directory cannot
+    be written, the parsed table is still returned.
+    """
+    if not cache:
+        return readverif(csvpath)
+    table = readcache(csvpath)
+    if table is not None:
+        return table
+    table = readverif(csvpath)
+    try:
+        writecache(csvpath, table)
+    except OSError:
+        pass  # a read-only data directory, just no cache
+    return table
@@ -0,0 +1,118 @@
+"""2x2 contingency tables for threshold events, for all leads and thresholds"""
+
+# The weather event is "temperature more than dt above climatology".  For a
+# forecast f, ob o and climatology c, and threshold dt:
+#
+#                      o > c + dt      o <= c + dt
+#   f > c + dt         TP (hits)       FP (false alarms)
+#   f <= c + dt        FN (misses)     TN (correct negatives)
+#
+# Instead of rescanning the data for every threshold, each value is given
+# the number of thresholds it exceeds (np.searchsorted on the sorted
+# thresholds).  A day is a hit for threshold k if both its forecast and its
+# ob exceed threshold k, so the hits for every threshold are a reversed
+# cumulative sum of a histogram of min(forecast count, ob count).
+# The whole (lead x threshold) table takes one sort of the thresholds and
+# one bincount.
+
+import numpy as np
+
+from .skill import validmask
+
+
+def _exceeds(counts, nbin):
+    """from a histogram of 'number of thresholds exceeded', the number of
+    values exceeding each threshold: out[..., k] = counts[..., k+1:].sum()"""
+    return np.cumsum(counts[..., ::-1], axis=-1)[..., ::-1][..., 1:nbin]
+
+
+def contingency(ob, fcst, clim, thresholds, mask=None, common=True, anomaly=True):
+    """TP, FP, FN, TN as (L, K) arrays, for L leads and K thresholds
+
+    With anomaly=True the event is value > clim + threshold, as in the
+    ForecastSkill.py exercise, otherwise it is value > threshold.
+    mask and common choose the days to count, as in dsa5021.skill.
+    """
+    ob = np.asarray(ob, dtype=np.float64)
+    clim = np.asarray(clim, dtype=np.float64)
+    fcst = np.asarray(fcst, dtype=np.float64)
+    if fcst.ndim == 1:
+        fcst = fcst[:, None]
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+    order = np.argsort(thresholds)
+    tsorted = thresholds[order]
+    valid = validmask(ob, fcst, clim, mask=mask, common=common)
+    nlead = fcst.shape[1]
+    nbin = len(tsorted) + 1
+
+    fa = fcst
+    oa = ob[:, None]
+    if anomaly:
+        # the files give values to 0.1, so rounding the difference makes
+        # f - c > dt agree with f > c + dt when f is exactly c + dt
+        fa = np.round(fa - clim[:, None], 6)
+        oa = np.round(oa - clim[:, None], 6)
+    # number of thresholds each value is above, 0 ... K
+    kf = np.searchsorted(tsorted, np.where(valid, fa, -np.inf), side="left")
+    ko = np.searchsorted(tsorted, np.where(valid, oa, -np.inf), side="left")
+    ko = np.broadcast_to(ko, kf.shape)
+    offset = np.arange(nlead)[None, :] * nbin  # a separate histogram per lead
+    w = valid.ravel().astype(np.float64)
+
+    def hist(k):
+        h = np.bincount((k + offset).ravel(), weights=w, minlength=nlead * nbin)
+        return h.reshape(nlead, nbin)
+
+    tp = _exceeds(hist(np.minimum(kf, ko)), nbin)  # both above
+    fyes = _exceeds(hist(kf), nbin)  # forecast above
+    oyes = _exceeds(hist(ko), nbin)  # ob above
+    n = valid.sum(axis=0)[:, None]
+    table = {"TP": tp, "FP": fyes - tp, "FN": oyes - tp}
+    table["TN"] = n - table["TP"] - table["FP"] - table["FN"]
+    unsort = np.argsort(order)  # back to the order thresholds were given
+    for k in table:
+        table[k] = np.rint(table[k][:, unsort]).astype(np.int64)
+    table["thresholds"] = thresholds
+    return table
+
+
+def contingencytable(table, thresholds, mask=None, common=True, anomaly=True):
+    """contingency for every forecast column of a VerifTable"""
+    return contingency(
+        table.ob,
+        table.fcst,
+        table.clim,
+        thresholds,
+        mask=mask,
+        common=common,
+        anomaly=anomaly,
+    )
+
+
+def categorical(ct):
+    """scores from a contingency dictionary, each an (L, K) array
+
+    POD  probability of detection   TP / (TP + FN)
+    FAR  false alarm ratio          FP / (TP + FP)
+    POFD false alarm rate           FP / (FP + TN)
+    CSI  critical success index     TP / (TP + FP + FN)
+    ETS  equitable threat score     (TP - R) / (TP + FP + FN - R)
+         with R = (TP + FP) (TP + FN) / N, the hits expected by chance
+    HSS  Heidke skill score
+    BIAS frequency bias             (TP + FP) / (TP + FN)
+    """
+    tp, fp, fn, tn = [ct[k].astype(np.float64) for k in ("TP", "FP", "FN", "TN")]
+    n = tp + fp + fn + tn
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (tp + fp) * (tp + fn) / n
+        return {
+            "POD": tp / (tp + fn),
+            "FAR": fp / (tp + fp),
+            "POFD": fp / (fp + tn),
+            "CSI": tp / (tp + fp + fn),
+            "ETS": (tp - r) / (tp + fp + fn - r),
+            "HSS": 2.0
+            * (tp * tn - fp * fn)
+            / ((tp + fn) * (fn + tn) + (tp + fp) * (fp + tn)),
+            "BIAS": (tp + fp) / (tp + fn),
+        }
@@ -0,0 +1,173 @@
+"""renders many figures in worker processes, skipping ones that are up to date"""
+
+# A figure job is (function, outfile, kwargs): a plotting function such as
+# dsa5021.plots.fplot, the PNG it writes, and its arguments.  Each worker
+# process uses the non-interactive Agg backend and closes every figure it
+# makes, so memory does not grow over a batch.  With workers=1 the figures
+# are made in the calling process, with pyplot on Agg only while they are.
+#
+# Before rendering, the job's arguments (array contents included) and the
+# source of the module of its plotting function are hashed, so editing
+# dsa5021/plots.py makes its figures out of date.  The hashes are kept in a
+# manifest in the output directory, and a job whose PNG exists with the same
+# hash is skipped.
+#
+# Workers are forked on Linux, so a script calling exportfigures is not
+# imported again by each of them.  Elsewhere (macOS, Windows) they are
+# spawned, as fork is not safe there, and the call must be under
+# if __name__ == "__main__".
+#
+# jobs = [(plots.fplot, "f1.png", dict(tdays=tdays, oo=oo, ff=ff1,
+#                                      lab="f1", title="ob vs. f1"))]
+# exportfigures(jobs)
+
+import contextlib
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MANIFEST = ".figures.json"
+
+
+def _feed(h, x):
+    """add x to the hash h, looking inside arrays, lists and dictionaries"""
+    if isinstance(x, np.ndarray):
+        h.update(b"array" + str(x.dtype).encode() + repr(x.shape).encode())
+        h.update(np.ascontiguousarray(x).tobytes())
+    elif isinstance(x, (list, tuple)):
+        h.update(b"list%d" % len(x))
+        for y in x:
+            _feed(h, y)
+    elif isinstance(x, dict):
+        h.update(b"dict%d" % len(x))
+        for k in sorted(x):
+            _feed(h, k)
+            _feed(h, x[k])
+    elif isinstance(x, range):
+        _feed(h, list(x))
+    else:
+        h.update(repr(x).encode())
+
+
+def _source(func):
+    """source of the module of func, or of func alone if that is all there is"""
+    for x in (sys.modules.get(func.__module__), func):
+        try:
+            return inspect.getsource(x)
+        except (OSError, TypeError):
+            pass
+    return ""
+
+
+def jobhash(func, kwargs):
+    """content hash of a figure job: the function, its module's source, and
+    all its arguments"""
+    h = hashlib.sha1()
+    _feed(h, func.__module__ + "." + func.__qualname__)
+    _feed(h, _source(func))
+    _feed(h, kwargs)
+    return h.hexdigest()
+
+
+def _context():
+    """fork on Linux, so the workers do not import __main__ again; spawn
+    elsewhere, so a script using workers needs if __name__ == "__main__" """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def _headless():
+    """Agg for good, in a worker process"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+@contextlib.contextmanager
+def _offscreen():
+    """pyplot on Agg for the duration, then back on the backend it had
+
+    Switching closes the figures pyplot has open.
+    """
+    import matplotlib.pyplot as plt
+
+    backend = plt.get_backend()
+    if backend.lower() == "agg":
+        yield
+        return
+    plt.switch_backend("Agg")
+    try:
+        yield
+    finally:
+        plt.switch_backend(backend)
+
+
+def _render(func, kwargs):
+    import matplotlib.pyplot as plt
+
+    try:
+        func(**kwargs)
+    finally:
+        plt.close("all")
+
+
+def _readmanifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def exportfigures(jobs, workers=None, manifestdir=".", force=False):
+    """render the jobs that are out of date, in parallel
+
+    Returns the list of outfiles that were rendered.  workers=1 renders in
+    this process, with pyplot on Agg until it is done; force=True ignores
+    the manifest.
+    """
+    manifestpath = os.path.join(manifestdir, MANIFEST)
+    manifest = _readmanifest(manifestpath)
+    todo = []
+    for func, outfile, kwargs in jobs:
+        digest = jobhash(func, kwargs)
+        key = os.path.abspath(outfile)
+        if not force and manifest.get(key) == digest and os.path.exists(outfile):
+            continue
+        todo.append((func, outfile, kwargs, key, digest))
+
+    done = []
+    failed = None  # the first exception from a worker
+    if workers == 1 and todo:
+        with _offscreen():
+            for func, outfile, kwargs, key, digest in todo:
+                _render(func, kwargs)
+                manifest[key] = digest
+                done.append(outfile)
+    elif todo:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_context(), initializer=_headless
+        ) as pool:
+            futures = [pool.submit(_render, job[0], job[2]) for job in todo]
+            for future, (func, outfile, kwargs, key, digest) in zip(futures, todo):
+                if future.exception() is not None:
+                    failed = failed or future.exception()
+                    continue
+                manifest[key] = digest
+                done.append(outfile)
+
+    if done:
+        tmppath = manifestpath + ".tmp"
+        with open(tmppath, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmppath, manifestpath)
+    if failed is not None:
+        raise failed
+    return done
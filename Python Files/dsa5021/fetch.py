@@ -0,0 +1,196 @@
+"""downloads data files, several at a time, with a local cache manifest"""
+
+# grabfile used to read a whole file into memory, and trusted any file that
+# already existed, even one cut short by a failed download.  Here each file
+# is streamed to a temporary file in chunks, checked against the size the
+# server gave (and a sha256, if one is known), and only then renamed into
+# place.  What was downloaded is recorded in a manifest, .grabfile.json, in
+# the download directory, so a later run can tell a good file from a bad one.
+# A file found with no manifest entry (there before the manifest, like the
+# CSV files in dsa5021-main, or cut short by the old grabfile) is checked:
+# it is recorded if it matches its known sha256, or, with none known, if
+# its size is the Content-Length of a HEAD request.  Otherwise it is
+# downloaded again.
+#
+# grabfiles("http://dsa5021.net/data/", ["09021_AIR_TEMP_MAX.csv",
+#                                        "09021_AIR_TEMP_MIN.csv"])
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+MANIFEST = ".grabfile.json"
+CHUNK = 1 << 16  # bytes read at a time
+
+_lock = threading.Lock()  # guards the manifest
+
+
+class FetchError(Exception):
+    pass
+
+
+def _manifestpath(filedir):
+    return os.path.join(filedir or ".", MANIFEST)
+
+
+def readmanifest(filedir=""):
+    try:
+        with open(_manifestpath(filedir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _writemanifest(filedir, manifest):
+    path = _manifestpath(filedir)
+    tmppath = path + ".tmp"
+    with open(tmppath, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmppath, path)
+
+
+def sha256file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def isgood(filename, filedir="", sha256=None, manifest=None):
+    """True if filename exists and matches the manifest (and sha256, if given)"""
+    filepath = os.path.join(filedir, filename)
+    if not os.path.exists(filepath):
+        return False
+    if sha256 is not None:
+        return sha256file(filepath) == sha256
+    if manifest is None:
+        manifest = readmanifest(filedir)
+    entry = manifest.get(filename)
+    if entry is None:
+        return False  # not downloaded by us, or the download did not finish
+    return os.path.getsize(filepath) == entry["size"]
+
+
+def remotesize(urlpath, timeout=60):
+    """Content-Length of urlpath from a HEAD request, or None if unknown"""
+    try:
+        with urlopen(Request(urlpath, method="HEAD"), timeout=timeout) as response:
+            length = response.headers.get("Content-Length")
+    except (OSError, ValueError):
+        return None
+    return None if length is None else int(length)
+
+
+def verify(urlfront, filename, filedir="", sha256=None, manifest=None, timeout=60):
+    """record a file that has no manifest entry, if it checks out
+
+    It does if it matches sha256, or, with no sha256, if its size is the
+    server's Content-Length.  Returns True if an entry was added; a file
+    that does not check out is left to be downloaded again.
+    """
+    if manifest is None:
+        manifest = readmanifest(filedir)
+    filepath = os.path.join(filedir, filename)
+    if filename in manifest or not os.path.exists(filepath):
+        return False
+    urlpath = urlfront + filename
+    size = os.path.getsize(filepath)
+    digest = sha256file(filepath)
+    if sha256 is not None:
+        if digest != sha256:
+            return False
+    elif size == 0 or remotesize(urlpath, timeout) != size:
+        return False
+    manifest[filename] = {"url": urlpath, "size": size, "sha256": digest}
+    return True
+
+
+def fetch(urlfront, filename, filedir="", sha256=None, timeout=60):
+    """download one file to filedir, atomically, and return its manifest entry"""
+    urlpath = urlfront + filename
+    filepath = os.path.join(filedir, filename)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmppath = tempfile.mkstemp(
+        prefix="." + filename + ".", suffix=".part", dir=filedir or "."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f, urlopen(urlpath, timeout=timeout) as response:
+            expected = response.headers.get("Content-Length")
+            for chunk in iter(lambda: response.read(CHUNK), b""):
+                f.write(chunk)
+                h.update(chunk)
+                size += len(chunk)
+        if expected is not None and size != int(expected):
+            raise FetchError(
+                "%s: got %d bytes, expected %s" % (urlpath, size, expected)
+            )
+        digest = h.hexdigest()
+        if sha256 is not None and digest != sha256:
+            raise FetchError(
+                "%s: sha256 is %s, expected %s" % (urlpath, digest, sha256)
+            )
+        os.replace(tmppath, filepath)
+    except BaseException:
+        if os.path.exists(tmppath):
+            os.remove(tmppath)
+        raise
+    return {"url": urlpath, "size": size, "sha256": digest}
+
+
+def grabfiles(urlfront, filenames, filedir="", workers=4, checksums=None, force=False):
+    """download the files that are not already good, workers at a time
+
+    checksums is an optional dictionary of filename -> sha256.
+    Returns the list of filenames that were downloaded.  If any download
+    fails, the others still finish, and then the first error is raised.
+    """
+    checksums = checksums or {}
+    if filedir and not os.path.exists(filedir):
+        os.makedirs(filedir)
+    manifest = readmanifest(filedir)
+    todo = []
+    verified = False
+    for filename in filenames:
+        if not force:
+            verified = (
+                verify(urlfront, filename, filedir, checksums.get(filename), manifest)
+                or verified
+            )
+        if not force and isgood(filename, filedir, checksums.get(filename), manifest):
+            print(os.path.join(filedir, filename), "already downloaded.")
+        else:
+            todo.append(filename)
+
+    if verified:
+        _writemanifest(filedir, manifest)
+
+    def one(filename):
+        entry = fetch(urlfront, filename, filedir, checksums.get(filename))
+        with _lock:
+            manifest[filename] = entry
+            _writemanifest(filedir, manifest)
+        print("downloaded " + entry["url"] + " to " + os.path.join(filedir, filename))
+        return filename
+
+    done = []
+    failed = None
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for future in [pool.submit(one, filename) for filename in todo]:
+            if future.exception() is not None:
+                failed = failed or future.exception()
+            else:
+                done.append(future.result())
+    if failed is not None:
+        raise failed
+    return done
+
+
+# for automatically downloading data files from http://dsa5021.net/data/, or other url
+def grabfile(urlfront, filename, filedir=""):  # filedir could be data/, for example
+    grabfiles(urlfront, [filename], filedir, workers=1)
@@ -0,0 +1,214 @@
+"""lazy (time, lat, lon) cubes of gridded data, read from netCDF a chunk at a time"""
+
+# GriddedSSTData.ipynb reads all of tos into memory and doubles it with
+# astype('float64').  Here the file stays on disk:
+#
+# g = opengridded("tos_O1_2001-2002.nc")     # g.cube, g.lat1d, g.lon1d
+# sst = g.cube
+# sst[0]                  # lazy: nothing is read yet
+# sst[0, 85, 100]         # reads one value
+# sst[:, lati, loni]      # reads one time series
+# sst[:, 75:85, :].mean(1)   # reads the band, 12 months at a time
+#
+# Indexing with ints and slices gives another LazyCube, a view on the same
+# file.  Values come out as masked arrays in the file's own dtype (float32
+# for tos) when a view is read (.read(), or any numpy function).  Reductions
+# (mean, sum, min, max) go through the view in chunks along its first axis,
+# and add up in float64, so only one chunk is in memory at a time.
+
+import numpy as np
+
+CHUNK = 12  # time steps read at a time
+
+
+def _normalize(key, ndim):
+    """key as a tuple of ndim ints and slices, Ellipsis expanded"""
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is Ellipsis for k in key):
+        i = [k is Ellipsis for k in key].index(True)
+        fill = ndim - (len(key) - 1)
+        key = key[:i] + (slice(None),) * fill + key[i + 1 :]
+    if len(key) > ndim:
+        raise IndexError("too many indices: %d for %d dimensions" % (len(key), ndim))
+    for k in key:
+        if not isinstance(k, (slice, int, np.integer)):
+            raise TypeError("LazyCube takes ints and slices, not %r" % (k,))
+    return key + (slice(None),) * (ndim - len(key))
+
+
+class LazyCube:
+    """a view, by ints and slices, of a sliceable source like a netCDF4 Variable
+
+    source needs .shape and numpy-style indexing with a tuple of ints and
+    slices: a netCDF4 or h5py variable, a numpy array or memmap.
+    """
+
+    def __init__(self, source, select=None, chunk=CHUNK):
+        self.source = source
+        self.chunk = chunk
+        if select is None:
+            select = tuple(range(n) for n in source.shape)
+        # for each source axis, an int (axis dropped) or a range of indices
+        self.select = select
+
+    @property
+    def shape(self):
+        return tuple(len(s) for s in self.select if isinstance(s, range))
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        return np.dtype(getattr(self.source, "dtype", np.float64))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "<LazyCube %s of %s>" % (self.shape, type(self.source).__name__)
+
+    def __getitem__(self, key):
+        key = _normalize(key, self.ndim)
+        select = []
+        keys = iter(key)
+        for s in self.select:
+            if not isinstance(s, range):
+                select.append(s)
+                continue
+            # a slice of a range is a range, an int of it an index
+            select.append(s[next(keys)])
+        view = LazyCube(self.source, tuple(select), self.chunk)
+        if view.ndim == 0:
+            return view.read()[()]
+        return view
+
+    def _sourcekey(self, select=None):
+        key = []
+        for s in select or self.select:
+            if isinstance(s, range):
+                if len(s) == 0:
+                    key.append(slice(0, 0))
+                elif s.step > 0:
+                    key.append(slice(s.start, s.stop, s.step))
+                else:
+                    # negative steps: read forwards, flip below
+                    key.append(slice(s[-1], s[0] + 1, -s.step))
+            else:
+                key.append(int(s))
+        return tuple(key)
+
+    def read(self):
+        """the values of the view, a masked array in the source dtype"""
+        data = self.source[self._sourcekey()]
+        data = np.ma.asarray(data)
+        flip = tuple(
+            slice(None, None, -1) if s.step < 0 else slice(None)
+            for s in self.select
+            if isinstance(s, range)
+        )
+        return data[flip]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.read()
+        if data.dtype.kind == "f":
+            data = data.filled(np.nan)
+        else:
+            data = np.asarray(data)
+        return data if dtype is None else data.astype(dtype)
+
+    def blocks(self, size=None):
+        """(start, masked array) for each chunk of size along the first axis"""
+        size = size or self.chunk
+        for start in range(0, len(self), size):
+            yield start, self[start : start + size].read()
+
+    def _reduce(self, axis, first, add, finish):
+        if axis is None:
+            acc = None
+            for start, block in self.blocks():
+                acc = add(acc, first(block, None))
+            return finish(acc)
+        axis = axis % self.ndim
+        if axis == 0:
+            acc = None
+            for start, block in self.blocks():
+                acc = add(acc, first(block, 0))
+            return finish(acc)
+        parts = [finish(first(block, axis)) for start, block in self.blocks()]
+        return np.ma.concatenate(parts, axis=0)
+
+    def sum(self, axis=None):
+        return self._reduce(axis, _sumcount, _addsums, lambda a: a[0])
+
+    def mean(self, axis=None):
+        return self._reduce(axis, _sumcount, _addsums, _meanof)
+
+    def min(self, axis=None):
+        return self._reduce(
+            axis, lambda b, ax: b.min(axis=ax), _pairwise(np.ma.minimum), _same
+        )
+
+    def max(self, axis=None):
+        return self._reduce(
+            axis, lambda b, ax: b.max(axis=ax), _pairwise(np.ma.maximum), _same
+        )
+
+
+def _sumcount(block, axis):
+    """float64 sum and count of the unmasked values of a block"""
+    block = np.ma.asarray(block, dtype=np.float64)
+    return block.sum(axis=axis), block.count(axis=axis)
+
+
+def _addsums(acc, new):
+    if acc is None:
+        return new
+    return acc[0] + new[0], acc[1] + new[1]
+
+
+def _meanof(acc):
+    total, count = acc
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.ma.masked_where(count == 0, np.ma.getdata(total) / count)
+
+
+def _pairwise(func):
+    return lambda acc, new: new if acc is None else func(acc, new)
+
+
+def _same(acc):
+    return acc
+
+
+class Gridded:
+    """an open netCDF file: cube is the lazy variable, with lat1d, lon1d, time"""
+
+    def __init__(self, dataset, varname="tos", chunk=CHUNK):
+        self.dataset = dataset
+        self.var = dataset.variables[varname]
+        self.cube = LazyCube(self.var, chunk=chunk)
+        self.lat1d = dataset.variables["lat"][:]
+        self.lon1d = dataset.variables["lon"][:]
+        self.time = (
+            dataset.variables["time"][:] if "time" in dataset.variables else None
+        )
+        self.units = getattr(self.var, "units", "")
+
+    def close(self):
+        self.dataset.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def opengridded(ncpath, varname="tos", chunk=CHUNK):
+    """open a netCDF file, like tos_O1_2001-2002.nc, without reading varname"""
+    from netCDF4 import Dataset
+
+    return Gridded(Dataset(ncpath, "r"), varname, chunk)
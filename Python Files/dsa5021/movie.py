@@ -0,0 +1,133 @@
+"""animations of a (time, lat, lon) cube, written straight to GIF, WebP, APNG or MP4"""
+
+# The SST animation of GriddedSSTData.ipynb writes a PNG per month into
+# sstpngs/, globs them back and hands them to janim.makeanim.  animate
+# draws each frame with dsa5021.pixels.PixelFrames into memory and sends it
+# to the encoder, so nothing but the animation is written:
+#
+# animate(g.lon1d, g.lat1d, g.cube, "sst.webp", titles, lowc=270, hic=305)
+# animate(g.lon1d, g.lat1d, clim.anomaly(g.cube), "anomaly.mp4",
+#         lowc=-6, hic=6, every=2, stride=2)
+#
+# .gif, .webp and .png (APNG) are made with PIL, .mp4 by piping raw RGB
+# frames to ffmpeg, which must be on the PATH.  The cube, a LazyCube or an
+# array, is read a chunk at a time; every and stride thin it in time and in
+# lat and lon before drawing.  PIL keeps all the frames of a GIF, WebP or
+# APNG in memory until it writes the file, so for long records thin them,
+# or make an MP4, whose frames are encoded as they come.
+
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+from .pixels import CHUNK, PixelFrames
+
+formats = {".gif": "GIF", ".webp": "WEBP", ".png": "PNG", ".apng": "PNG", ".mp4": None}
+
+
+def frameimages(
+    lon1d, lat1d, cube, titles=None, every=1, stride=1, chunk=CHUNK, **kwargs
+):
+    """RGB arrays of the frames of cube, one PixelFrames drawing them all
+
+    kwargs are those of PixelFrames (lowc, hic, signature, caption, dpi,
+    sizemult).  The figure is drawn off screen, with any Agg based backend.
+    """
+    frames = PixelFrames(
+        np.asarray(lon1d)[::stride], np.asarray(lat1d)[::stride], **kwargs
+    )
+    steps = range(0, len(cube), every)
+    try:
+        for a in range(0, len(steps), chunk):
+            picked = steps[a : a + chunk]
+            block = cube[picked.start : picked[-1] + 1 : every, ::stride, ::stride]
+            block = block.read() if hasattr(block, "read") else np.ma.asarray(block)
+            for i, data in zip(picked, block):
+                yield frames.image(data, titles[i] if titles is not None else None)
+    finally:
+        frames.close()
+
+
+def _pillow(images, outfile, fmt, fps, loop):
+    from PIL import Image
+
+    # PIL goes through the frames more than once, so they are all kept
+    first, *pictures = [Image.fromarray(image) for image in images]
+    first.save(
+        outfile,
+        format=fmt,
+        save_all=True,
+        append_images=pictures,
+        duration=int(round(1000.0 / fps)),
+        loop=loop,
+    )
+
+
+def _ffmpeg(images, outfile, fps, ffmpeg="ffmpeg"):
+    if shutil.which(ffmpeg) is None:
+        raise OSError("%s is not on the PATH, it is needed for %s" % (ffmpeg, outfile))
+    proc = None
+    try:
+        for image in images:
+            if proc is None:
+                height, width = image.shape[:2]
+                proc = subprocess.Popen(
+                    [ffmpeg, "-y", "-loglevel", "error"]
+                    + ["-f", "rawvideo", "-pix_fmt", "rgb24"]
+                    + ["-s", "%dx%d" % (width, height), "-r", str(fps), "-i", "-"]
+                    # yuv420p, for most players, needs even sizes
+                    + ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white"]
+                    + ["-pix_fmt", "yuv420p", outfile],
+                    stdin=subprocess.PIPE,
+                )
+            proc.stdin.write(np.ascontiguousarray(image).tobytes())
+        if proc is not None:
+            proc.stdin.close()
+    except BrokenPipeError:
+        pass  # ffmpeg stopped early; its exit status is checked below
+    except BaseException:
+        # the frames failed: stop ffmpeg, and let their error through
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+        raise
+    if proc is not None and proc.wait() != 0:
+        raise OSError("%s failed making %s" % (ffmpeg, outfile))
+
+
+def writeanimation(images, outfile, fps=4, loop=0):
+    """write RGB arrays to outfile, the format from its extension"""
+    ext = os.path.splitext(outfile)[1].lower()
+    if ext not in formats:
+        raise ValueError(
+            "cannot animate to %s, use one of %s" % (outfile, " ".join(sorted(formats)))
+        )
+    if formats[ext] is None:
+        _ffmpeg(images, outfile, fps)
+    else:
+        _pillow(images, outfile, formats[ext], fps, loop)
+    return outfile
+
+
+def animate(
+    lon1d,
+    lat1d,
+    cube,
+    outfile,
+    titles=None,
+    fps=4,
+    loop=0,
+    every=1,
+    stride=1,
+    chunk=CHUNK,
+    **kwargs
+):
+    """an animation of every every'th time step of cube, written to outfile
+
+    kwargs are those of PixelFrames (lowc, hic, signature, caption, dpi,
+    sizemult).
+    """
+    images = frameimages(lon1d, lat1d, cube, titles, every, stride, chunk, **kwargs)
+    return writeanimation(images, outfile, fps, loop)
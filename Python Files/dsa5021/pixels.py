@@ -0,0 +1,234 @@
+"""pixel maps of gridded data, like plotpixels2, and fast animation frames"""
+
+# plotpixels2 of GriddedSSTData.ipynb makes the corner meshgrid, figure,
+# axes, colorbar and pcolormesh again for every frame of an animation.
+# PixelFrames makes them once; each frame then only changes the mesh
+# values and the title before the PNG is written.  The figure is drawn with
+# Agg on its own canvas, not through pyplot, so it leaves the backend of
+# the calling process alone:
+#
+# frames = PixelFrames(g.lon1d, g.lat1d, lowc=270, hic=305, signature="metrprof")
+# frames.draw(sst[0], "SST 2001 1", "sstpngs/0000.png")
+#
+# renderframes does that for every time step of a (time, lat, lon) cube, or
+# dsa5021.gridded.LazyCube, reading the cube a chunk at a time.  It draws in
+# this process unless asked for workers: on the 2 degree SST grid the worker
+# processes cost as much as they save (python -m dsa5021.bench --only frames
+# frames_parallel compares the two on a given machine).
+#
+# titles = ["SST %d %d" % (2001 + i // 12, i % 12 + 1) for i in range(24)]
+# pngs = renderframes(g.lon1d, g.lat1d, g.cube, "sstpngs", titles,
+#                     lowc=270, hic=305, signature="metrprof")
+# makeanim(pngs, outfile="sst.html", sortOrder=True, ctlOnSide=True)
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .export import _context
+
+CHUNK = 12  # frames given to a worker at a time
+
+
+def corners(lon1d, lat1d):
+    """lonp, latp: pixel edges, one longer than lon1d and lat1d"""
+    lon1d = np.asarray(lon1d, dtype=np.float64)
+    lat1d = np.asarray(lat1d, dtype=np.float64)
+    delon = lon1d[1] - lon1d[0]
+    delat = lat1d[1] - lat1d[0]
+    lonp = np.append(lon1d - 0.5 * delon, lon1d[-1] + 0.5 * delon)
+    latp = np.append(lat1d - 0.5 * delat, lat1d[-1] + 0.5 * delat)
+    return lonp, latp
+
+
+def cbformat(datamax):
+    """colorbar tick format of plotpixels2, from the largest value"""
+    if datamax > 1000.0:
+        return "%7.1e"
+    if datamax > 5.0:
+        return "%d"
+    return "%5.2f"
+
+
+class PixelFrames:
+    """the figure of plotpixels2, made once, redrawn with new data and title
+
+    lowc and hic fix the color range of every frame; if None, each frame is
+    scaled to its own min and max, as plotpixels2 does.  The colorbar format
+    is chosen from the largest value of each frame, as plotpixels2 does.
+    startlon is unused, as in plotpixels2.
+    """
+
+    def __init__(
+        self,
+        lon1d,
+        lat1d,
+        lowc=None,
+        hic=None,
+        signature="",
+        startlon=0.0,
+        caption=None,
+        dpi=144,
+        sizemult=1,
+    ):
+        import matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.lowc = lowc
+        self.hic = hic
+        self.dpi = dpi
+        lonp, latp = corners(lon1d, lat1d)
+        lons, lats = np.meshgrid(lonp, latp)
+        xsize = sizemult * matplotlib.rcParams["figure.figsize"][0]
+        self.fig = Figure(figsize=(xsize, 0.5 * xsize))
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_axes([0.08, 0.1, 0.7, 0.7], facecolor="white")
+        empty = np.ma.masked_all((len(latp) - 1, len(lonp) - 1))
+        self.mesh = self.ax.pcolormesh(
+            lons, lats, empty, cmap=matplotlib.colormaps["jet"]
+        )
+        self.title = self.ax.set_title("")
+        self.cax = self.fig.add_axes([0.85, 0.1, 0.05, 0.7])
+        self.colorbar = None
+        self.format = None
+        self.ax.axis([lonp[0], lonp[-1], latp[0], latp[-1]])
+        if caption:
+            self.ax.text(-0.1, -0.15, caption, fontsize=10, transform=self.ax.transAxes)
+        if signature:
+            self.ax.text(
+                -0.1,
+                0.0,
+                signature,
+                fontsize=48,
+                alpha=0.1,
+                transform=self.ax.transAxes,
+            )
+
+    def draw(self, data, title=None, outfile=None):
+        """show a (lat, lon) array, and write it to outfile if given"""
+        data = np.ma.asarray(data)
+        self.mesh.set_array(data)
+        datamax = data.max()
+        lowc = data.min() if self.lowc is None else self.lowc
+        hic = datamax if self.hic is None else self.hic
+        self.mesh.set_clim(lowc, hic)
+        fmt = cbformat(datamax)
+        if self.colorbar is None:
+            self.colorbar = self.fig.colorbar(self.mesh, cax=self.cax, format=fmt)
+        elif fmt != self.format:
+            from matplotlib.ticker import FormatStrFormatter
+
+            self.colorbar.formatter = FormatStrFormatter(fmt)
+        self.format = fmt
+        self.title.set_text(title or "")
+        if outfile is not None:
+            self.fig.savefig(outfile, dpi=self.dpi, facecolor="w", edgecolor="w")
+        return self.fig
+
+    def image(self, data, title=None):
+        """a frame as an (height, width, 3) uint8 RGB array, as savefig would draw it"""
+        self.draw(data, title)
+        self.fig.set_dpi(self.dpi)
+        self.fig.set_facecolor("w")
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba())[:, :, :3].copy()
+
+    def close(self):
+        self.fig.clear()
+
+
+def plotpixels2(
+    lon1d,
+    lat1d,
+    data,
+    lowc=None,
+    hic=None,
+    title=None,
+    signature="",
+    startlon=0.0,
+    outfile=None,
+    caption=None,
+    dpi=144,
+    sizemult=1,
+):
+    """one pixel map, as in GriddedSSTData.ipynb; returns the figure"""
+    frames = PixelFrames(
+        lon1d, lat1d, lowc, hic, signature, startlon, caption, dpi, sizemult
+    )
+    return frames.draw(data, title, outfile)
+
+
+_frames = None  # the PixelFrames of a worker process
+
+
+def _setup(lon1d, lat1d, kwargs):
+    global _frames
+    _frames = PixelFrames(lon1d, lat1d, **kwargs)
+
+
+def _block(cube, a, b):
+    block = cube[a:b]
+    # a LazyCube reads as a masked array
+    return block.read() if hasattr(block, "read") else np.ma.asarray(block)
+
+
+def _drawframes(block, titles, outfiles):
+    for data, title, outfile in zip(block, titles, outfiles):
+        _frames.draw(data, title, outfile)
+    return outfiles
+
+
+def renderframes(
+    lon1d,
+    lat1d,
+    cube,
+    outdir,
+    titles=None,
+    pattern="%0.4d.png",
+    workers=1,
+    chunk=CHUNK,
+    **kwargs
+):
+    """a PNG in outdir for each time step of cube; returns their paths
+
+    kwargs are those of PixelFrames (lowc, hic, signature, caption, dpi,
+    sizemult).  workers=1 draws in this process; otherwise each of workers
+    processes (None for all the cores) keeps its own PixelFrames.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    ntime = len(cube)
+    titles = list(titles) if titles is not None else [None] * ntime
+    outfiles = [os.path.join(outdir, pattern % i) for i in range(ntime)]
+    tasks = (
+        (_block(cube, a, a + chunk), titles[a : a + chunk], outfiles[a : a + chunk])
+        for a in range(0, ntime, chunk)
+    )
+    if workers == 1:
+        _setup(lon1d, lat1d, kwargs)
+        try:
+            for task in tasks:
+                _drawframes(*task)
+        finally:
+            _frames.close()
+        return outfiles
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_context(),
+        initializer=_setup,
+        initargs=(lon1d, lat1d, kwargs),
+    ) as pool:
+        # a couple of chunks per worker in flight, so the cube is read as
+        # the frames are drawn, not all at once
+        limit = 2 * (workers or os.cpu_count() or 1)
+        pending = set()
+        for task in tasks:
+            if len(pending) >= limit:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+            pending.add(pool.submit(_drawframes, *task))
+        for future in pending:
+            future.result()
+    return outfiles
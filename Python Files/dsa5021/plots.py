@@ -0,0 +1,128 @@
+"""figures for the forecast verification: skill bars, scatter and time series"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+
+from .verifdata import meane
+
+
+def skillbars(
+    fkeys, skills, title, outfile=None, color="blue", signature="", groups=None
+):
+    """bar chart of skill for each lead, like skillscoresRMSEmodel.png
+
+    skills has one value per lead, or is (G, L) with a row for each of the
+    groups, for example the seasons from dsa5021.rolling.groupskill.
+    Returns the figure.
+    """
+    skills = np.asarray(skills, dtype=np.float64)
+    fig = plt.figure(figsize=(8, 4))
+    plt.title(title)
+    if skills.ndim == 1:
+        plt.bar(fkeys, skills, color=color)
+    else:
+        ng = skills.shape[0]
+        x = np.arange(len(fkeys))
+        width = 0.8 / ng
+        for g in range(ng):
+            label = groups[g] if groups else None
+            plt.bar(x + (g - 0.5 * (ng - 1)) * width, skills[g], width, label=label)
+        plt.xticks(x, fkeys)
+        if groups:
+            plt.legend(fontsize=8)
+    plt.text(0.0, 0.0, signature, fontsize=48, alpha=0.1)
+    if outfile:
+        fig.savefig(outfile)
+    return fig
+
+
+def skillseries(utc, skills, fkeys, title, outfile=None, signature=""):
+    """skill against time, a line for each lead, from dsa5021.rolling.rollingskill"""
+    tdays = (np.asarray(utc) - utc[0]) / 86400  # elapsed days
+    fig, ax = plt.subplots(figsize=(18, 3))
+    for j, fk in enumerate(fkeys):
+        ax.plot(tdays, skills[:, j], lw=1, label=fk)
+    ax.axhline(0.0, color="k", lw=0.5)
+    ax.set_xlabel("day")
+    ax.set_ylabel("skill")
+    ax.set_title(title)
+    ax.legend(ncol=len(fkeys), fontsize=8)
+    ax.text(0.05, 0.1, signature, fontsize=48, alpha=0.1, transform=ax.transAxes)
+    if outfile:
+        fig.savefig(outfile, dpi=144)
+    return fig
+
+
+def fplot(tdays, oo, ff, lab, title):
+    """ob as green dots, with a line from forecast to ob for each day,
+    red where the ob is above the forecast, blue where it is not
+
+    All the red lines are one LineCollection, and all the blue lines another,
+    rather than a Line2D for each day.  Saves lab + ".png", returns the figure.
+    """
+    tdays = np.asarray(tdays, dtype=np.float64)
+    oo = np.asarray(oo, dtype=np.float64)
+    ff = np.asarray(ff, dtype=np.float64)
+    rmse, mae = meane(oo, ff)
+    rootmeansq = "{:.3f}".format(rmse)
+    quick, simple = plt.subplots(figsize=(18, 3))
+    simple.plot(tdays, oo, ".g", lw=1, ms=3, zorder=1)
+    # segments[i] = [(tdays[i], ff[i]), (tdays[i], oo[i])]
+    segments = np.stack(
+        [np.column_stack([tdays, ff]), np.column_stack([tdays, oo])], axis=1
+    )
+    above = oo > ff
+    for segcol, which in (("r", above), ("b", ~above)):
+        lines = LineCollection(
+            segments[which],
+            colors=segcol,
+            linewidths=1.0,
+            capstyle="projecting",  # as for a Line2D
+            zorder=0,
+        )
+        simple.add_collection(lines)
+    simple.autoscale_view()
+    simple.set_xticks(range(0, 360, 30))  # x tick marks every 30
+    simple.set_ylabel("degree C")
+    simple.set_xlabel("day")
+    simple.set_title(title, fontsize=22)
+    simple.text(0.05, 0.8, "RMSE=" + rootmeansq, transform=simple.transAxes)
+    quick.savefig(lab + ".png", dpi=144)
+    return quick
+
+
+def scatter3(oo, panels, varname, forecast, sitename, outfile, color, signature=""):
+    """three scatter plots of ob against a forecast, like *_scatter_model.png
+
+    panels is a list of three (label, values, skill), for example
+    [("f1", ffs["f1"], skilld["f1"]), ("f7", ...), ("clim", cc, 0.0)].
+    """
+    fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(13, 4), facecolor="yellow")
+    if "MAX" in varname:
+        tlo = 10
+        thi = 45
+    else:
+        tlo = -5
+        thi = 30
+    fsz = 18
+    tcks = range(tlo, thi + 1, 5)
+    skt = "skill score= {: .2f}"
+    for i, (label, values, skill) in enumerate(panels):
+        ax[i].set_xlim(tlo, thi)
+        ax[i].set_ylim(tlo, thi)
+        ax[i].plot(values, oo, ".", color=color)
+        ax[i].set_xlabel(label, fontsize=fsz)
+        if i == 0:
+            ax[i].set_ylabel("ob", fontsize=fsz)
+        ax[i].set_xticks(tcks)
+        ax[i].set_yticks(tcks)
+        ax[i].set_title(skt.format(skill))
+        ax[i].set_aspect("equal")
+
+    figtitle = varname + "  " + "forecast=" + forecast + "   " + sitename
+    fig.text(0.5, 1, figtitle, ha="center", fontsize=fsz)
+    fig.text(0.1, 0.5, signature, fontsize=48, alpha=0.1)
+    fig.text(0.90, 0.95, "n=" + repr(len(oo)))
+    fig.savefig(outfile, bbox_inches="tight", facecolor="yellow", transparent=False)
+    return fig
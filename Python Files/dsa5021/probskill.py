@@ -0,0 +1,140 @@
+"""Brier score and its reliability, resolution, uncertainty parts, for all leads"""
+
+# ForecastProbabilitySkill.ipynb scores probability of precipitation (PoP)
+# forecasts, like 31011_DailyPoP1.csv, where ob is the rain in mm and clim
+# and f1 ... f7 are PoP in percent.  The event is rained = ob >= raintrigger.
+#
+# The notebook keeps verif[round(PoP, 1)], a list of the 1s and 0s seen for
+# each PoP.  Only the length and sum of each list are ever used, so here a
+# forecast is just counted into one of 11 PoP categories, 0.0, 0.1 ... 1.0,
+# with a bincount over (lead, category).  probcounts returns these sums,
+# which can be added together chunk by chunk, and brierscores turns them
+# into scores, so memory does not grow with the length of the record:
+#
+# sums = probcounts(ob, prob, clim, raintrigger=1)
+# scores = brierscores(sums)    # scores["bss"][0] is the BSS of f1
+#
+# By default a day is scored if ob, clim, f1 and f2 are all there, the gkeys
+# of the notebook, so 31011_DailyPoP1.csv gives its N=340 and BSS 0.397.
+# common=True scores only the days with all 7 leads, common=False each lead
+# on its own days.
+
+import numpy as np
+
+from .skill import validmask
+
+NCAT = 11  # PoP categories 0.0, 0.1 ... 1.0
+COMMON = 2  # days are scored when f1 and f2 are good, as in the notebook
+pops = np.arange(NCAT) / 10.0
+
+sums = ["n", "count", "hits", "sqerr", "sqerrc"]
+
+
+def popcategory(prob):
+    """index into pops of round(prob, 1), rounded the way Python rounds"""
+    prob = np.asarray(prob, dtype=np.float64)
+    t = prob * 10.0
+    k = np.floor(t + 0.5)
+    # a PoP like 0.35 is a tie to np.rint, but round(0.35, 1) is 0.3 because
+    # the float 0.35 is just below 0.35; Python settles the few distinct ties
+    tie = np.abs(t - np.floor(t) - 0.5) < 1e-9
+    if tie.any():
+        u, inv = np.unique(prob[tie], return_inverse=True)
+        k[tie] = np.array([round(round(x, 1) * 10.0) for x in u.tolist()])[inv]
+    return k.astype(np.int64)
+
+
+def probcounts(ob, prob, clim, raintrigger=1, mask=None, common=COMMON):
+    """sums for brierscores, for each of the L leads (columns) of prob
+
+    prob and clim are probabilities, 0 to 1.  The sums are
+      n       (L,)    number of forecasts scored
+      count   (L, 11) forecasts in each PoP category
+      hits    (L, 11) of those, how many had rain
+      sqerr   (L,)    sum of (rained - prob)**2, prob not rounded
+      sqerrc  (L,)    sum of (rained - clim)**2 on the same days
+    mask and common choose the days, as in dsa5021.skill.
+    """
+    ob = np.asarray(ob, dtype=np.float64)
+    clim = np.asarray(clim, dtype=np.float64)
+    prob = np.asarray(prob, dtype=np.float64)
+    if prob.ndim == 1:
+        prob = prob[:, None]
+    valid = validmask(ob, prob, clim, mask=mask, common=common)
+    nlead = prob.shape[1]
+    rained = (ob >= raintrigger).astype(np.float64)[:, None]
+
+    p = np.where(valid, prob, 0.0)
+    c = np.where(valid, clim[:, None], 0.0)
+    cat = popcategory(p) + NCAT * np.arange(nlead)[None, :]
+    w = valid.ravel().astype(np.float64)
+    wr = (valid * rained).ravel()
+    size = NCAT * nlead
+    count = np.bincount(cat.ravel(), weights=w, minlength=size)
+    hits = np.bincount(cat.ravel(), weights=wr, minlength=size)
+    return {
+        "n": valid.sum(axis=0).astype(np.int64),
+        "count": count.reshape(nlead, NCAT).astype(np.int64),
+        "hits": hits.reshape(nlead, NCAT).astype(np.int64),
+        "sqerr": (valid * (rained - p) ** 2).sum(axis=0),
+        "sqerrc": (valid * (rained - c) ** 2).sum(axis=0),
+    }
+
+
+def addcounts(a, b):
+    """the sums for the days of a and b together"""
+    return {k: a[k] + b[k] for k in sums}
+
+
+def brierscores(counts):
+    """dictionary of length L arrays, one value for each lead time
+
+    bs and bsc are the Brier scores of the forecasts and of clim, bss is
+    1 - bs/bsc.  bsa is the Brier score with PoP rounded to 0.1, which is
+    reli - reso + unc.  obar is the observed frequency, bias is the number
+    of forecasts for rain (sum of rounded PoP) over the number of rain events.
+    obk, (L, 11), is the observed frequency in each PoP category, nan if empty.
+    """
+    n = counts["n"].astype(np.float64)
+    count = counts["count"].astype(np.float64)
+    hits = counts["hits"].astype(np.float64)
+    nr = hits.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        obk = hits / count
+        obar = nr / n
+        # (pop - o)**2 summed over the 1s and 0s in each category
+        bsa = ((count - hits) * pops**2 + hits * (pops - 1.0) ** 2).sum(axis=1) / n
+        reli = np.where(count > 0, count * (pops - obk) ** 2, 0.0).sum(axis=1) / n
+        reso = (
+            np.where(count > 0, count * (obk - obar[:, None]) ** 2, 0.0).sum(axis=1) / n
+        )
+        unc = obar * (1.0 - obar)
+        bs = counts["sqerr"] / n
+        bsc = counts["sqerrc"] / n
+        nf = (count * pops).sum(axis=1)
+        return {
+            "n": counts["n"],
+            "bs": bs,
+            "bsc": bsc,
+            "bss": 1.0 - bs / bsc,
+            "bsa": bsa,
+            "reli": reli,
+            "reso": reso,
+            "unc": unc,
+            "obar": obar,
+            "bias": nf / nr,
+            "obk": obk,
+        }
+
+
+def brierskill(table, raintrigger=1, mask=None, common=COMMON):
+    """brierscores for every forecast column of a PoP VerifTable (in percent)"""
+    counts = probcounts(
+        table.ob,
+        table.fcst / 100.0,
+        table.clim / 100.0,
+        raintrigger=raintrigger,
+        mask=mask,
+        common=common,
+    )
+    return brierscores(counts)
@@ -0,0 +1,244 @@
+"""data quality checks on the raw obs and forecasts of the Australia study"""
+
+# The checks AustraliaVerificationData.ipynb prints as it goes, done on
+# arrays and returned as a report, a dictionary for each station:
+#
+#   obs   duplicate   valid_start times repeated with the same line
+#         different   valid_start times repeated with a different line
+#         timegap     times after a gap that is not 3600 s, and the gaps
+#   fcst  span        valid_start times with a span that is not spanx hours
+#         dst         valid_start times an hour after another valid_start
+#         gaphours    valid_start times with no forecast at fhour starth
+#         missing     valid_start times without all of needset
+#         timejump    base_time after a jump of more than a day, and the jumps
+#         basehour    base_time not at 00 UTC
+#         repeated    count of lines repeating a valid_start and fhour
+#
+# report = qcstation("australia_study/", "12038", "AIR_TEMP_MAX")
+# if not clean(report, ["different", "missing"]): ...
+#
+# python -m dsa5021.qc australia_study/ --sites 09021 12038 31011
+
+import os
+
+import numpy as np
+
+from .rawfcst import NA, readforecasts
+from .verifdata import siteinfo
+
+HOUR = 3600
+DAY = 86400
+
+fcstpars = {"AIR_TEMP_MAX": "MaxT", "AIR_TEMP_MIN": "MinT", "PRCP": "DailyPoP1"}
+
+
+def window(lookfor, sitename=""):
+    """(spanx, starth) of the daily window for lookfor, as in the notebooks"""
+    cairns = "CAIRNS" in sitename
+    if lookfor == "PRCP":
+        return 24, 15
+    if "MIN" in lookfor:
+        return 15, 8 if cairns else 10
+    return 15, 20 if cairns else 22
+
+
+def readobs(lines, pars):
+    """{par: (valid_start, value, line)} arrays, in file order, one pass
+
+    A value that is blank or NA is read as nan.
+    """
+    fields = {par: ([], [], []) for par in pars}
+    for line in lines:
+        q = line.strip().split(",")
+        if len(q) < 6 or q[2] not in fields:
+            continue
+        valid_start, value, text = fields[q[2]]
+        valid_start.append(int(q[3]))
+        try:
+            value.append(float(q[5]))
+        except ValueError:
+            value.append(np.nan)  # blank or NA, as dsa5021.rawobs counts it
+        text.append(line.strip())
+    return {
+        par: (
+            np.array(vs, dtype=np.int64),
+            np.array(v, dtype=np.float64),
+            np.array(t, dtype=object),
+        )
+        for par, (vs, v, t) in fields.items()
+    }
+
+
+def qcobs(valid_start, text):
+    """obs part of the report, from the valid_start and text of each line"""
+    order = np.argsort(valid_start, kind="stable")
+    vs = valid_start[order]
+    text = text[order]
+    again = np.zeros(len(vs), dtype=bool)
+    again[1:] = vs[1:] == vs[:-1]
+    # a repeat is compared with the first line for its valid_start, like obsx
+    first = np.maximum.accumulate(np.where(~again, np.arange(len(vs)), 0))
+    same = text == text[first]
+    times = vs[~again]
+    gaps = np.diff(times)
+    jump = np.flatnonzero(gaps != HOUR)
+    return {
+        "distinct": len(times),
+        "duplicate": vs[again & same],
+        "different": vs[again & ~same],
+        "timegap": times[jump + 1],
+        "gap": gaps[jump],
+    }
+
+
+def qcforecast(index, spanx, starth, nlead=7):
+    """forecast part of the report, from a rawfcst.ForecastIndex"""
+    kvs = index.valid_start
+    present = index.present
+    need = starth + 24 * np.arange(nlead)
+    fhour = index.fhour
+    if fhour.shape[1] < nlead:
+        fhour = np.pad(fhour, ((0, 0), (0, nlead - fhour.shape[1])), constant_values=NA)
+    badspan = (present & (index.span != spanx)).any(axis=1)
+    dst = np.isin(kvs - HOUR, kvs)
+    gaphours = ~(fhour == starth).any(axis=1)
+    missing = ~(fhour[:, :nlead] == need).all(axis=1)
+    bts = np.unique(index.base_time[present])
+    jumps = np.diff(bts)
+    big = np.flatnonzero(jumps > DAY)
+    return {
+        "valid_starts": len(kvs),
+        "span": kvs[badspan],
+        "dst": kvs[dst],
+        "gaphours": kvs[gaphours],
+        "missing": kvs[missing],
+        "timejump": bts[big + 1],
+        "jump": jumps[big],
+        "basehour": bts[bts % DAY != 0],
+        "repeated": index.duplicates,
+    }
+
+
+checks = [
+    ("obs", "duplicate"),
+    ("obs", "different"),
+    ("obs", "timegap"),
+    ("fcst", "span"),
+    ("fcst", "dst"),
+    ("fcst", "gaphours"),
+    ("fcst", "missing"),
+    ("fcst", "timejump"),
+    ("fcst", "basehour"),
+    ("fcst", "repeated"),
+]
+
+
+def counts(report):
+    """number of problems found by each check"""
+    out = {}
+    for part, name in checks:
+        x = report[part][name]
+        out[name] = x if np.isscalar(x) else len(x)
+    return out
+
+
+def clean(report, names=None):
+    """True if none of the checks in names (default: all) found a problem"""
+    n = counts(report)
+    return not any(n[name] for name in (names or n))
+
+
+def _report(site, lookfor, obs, index):
+    sitename = siteinfo.get(site, "")
+    spanx, starth = window(lookfor, sitename)
+    valid_start, value, text = obs[lookfor]
+    return {
+        "site": site,
+        "sitename": sitename,
+        "lookfor": lookfor,
+        "lookforf": fcstpars[lookfor],
+        "spanx": spanx,
+        "starth": starth,
+        "obs": qcobs(valid_start, text),
+        "fcst": qcforecast(index[fcstpars[lookfor]], spanx, starth),
+    }
+
+
+def qcstation(pdir, site, lookfor, obslines=None, fcstlines=None):
+    """the report for one site and parameter, from <site>obs.csv and <site>fcst.csv
+
+    obslines and fcstlines, if given, are used instead of reading the files.
+    """
+    return qcsite(pdir, site, [lookfor], obslines, fcstlines)[0]
+
+
+def qcsite(pdir, site, lookfors, obslines=None, fcstlines=None):
+    """reports for several parameters of one site, reading each file once"""
+    if obslines is None:
+        with open(os.path.join(pdir, site + "obs.csv")) as f:
+            obs = readobs(f, lookfors)
+    else:
+        obs = readobs(obslines, lookfors)
+    lookforfs = [fcstpars[lookfor] for lookfor in lookfors]
+    if fcstlines is None:
+        with open(os.path.join(pdir, site + "fcst.csv")) as f:
+            index = readforecasts(f, lookforfs)
+    else:
+        index = readforecasts(fcstlines, lookforfs)
+    return [_report(site, lookfor, obs, index) for lookfor in lookfors]
+
+
+def qcsites(pdir, sites, lookfors=("AIR_TEMP_MAX", "AIR_TEMP_MIN", "PRCP")):
+    """reports for every site and parameter"""
+    reports = []
+    for site in sites:
+        reports += qcsite(pdir, site, lookfors)
+    return reports
+
+
+def tojson(report):
+    """the report with lists in place of arrays, for json.dump"""
+    out = {}
+    for k, v in report.items():
+        if isinstance(v, dict):
+            v = tojson(v)
+        elif isinstance(v, np.ndarray):
+            v = v.tolist()
+        elif isinstance(v, np.integer):
+            v = int(v)
+        out[k] = v
+    return out
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(
+        description="data quality checks on <site>obs.csv and <site>fcst.csv"
+    )
+    parser.add_argument("pdir", nargs="?", default="australia_study/")
+    parser.add_argument("--sites", nargs="*", default=sorted(siteinfo))
+    parser.add_argument(
+        "--vars", nargs="*", default=list(fcstpars), help="obs parameters to check"
+    )
+    parser.add_argument("--json", help="also write the full reports here")
+    args = parser.parse_args(argv)
+
+    reports = qcsites(args.pdir, args.sites, args.vars)
+    names = [name for part, name in checks]
+    print("site  var          " + " ".join("%9s" % name for name in names))
+    for report in reports:
+        n = counts(report)
+        print(
+            "%-5s %-12s " % (report["site"], report["lookfor"])
+            + " ".join("%9d" % n[name] for name in names)
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([tojson(r) for r in reports], f, indent=1)
+        print("written:", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""index of the raw forecasts of the Australia study, by valid_start and lead"""
+
+# A line of the raw forecast file, like australia_study/12038fcst.csv, is
+#
+#   ... , par, valid_start, valid_end, value, ... , base_time
+#   q[2]  q[3]         q[4]       q[5]             q[-1]
+#
+# AustraliaVerificationData.ipynb scans the lines once per parameter and
+# builds fdict[valid_start][fhour], fhour = (valid_start - base_time)//3600.
+# Here one pass over the file fills a ForecastIndex for every parameter
+# wanted.  The forecasts are held as 2-D arrays with a row for each distinct
+# valid_start, sorted, and a column for each lead day, fhour//24:
+#
+# with open(fcstfile) as fcsts:
+#     index = readforecasts(fcsts, ["MaxT", "MinT", "DailyPoP1"])
+# ff = index["MaxT"].gather(kvs, hour=22)   # f1 ... f7 for the days kvs
+#
+# As in fdict, the first line for a valid_start and fhour is kept and later
+# ones are counted as duplicates.  Lines valid before their base_time are
+# the model's assimilation, not forecasts, and are left out, as they are
+# from the f1 ... f7 columns of the notebook's edict.
+
+import numpy as np
+
+HOUR = 3600
+NA = -1  # base_time, span and fhour where there is no forecast
+
+
+class ForecastIndex:
+    """one parameter's forecasts: rows are valid_start, columns are lead days
+
+    value, base_time, span (hours) and fhour are arrays of shape
+    (len(valid_start), nlead); value is nan and the others NA (-1) where
+    there is no forecast.
+    """
+
+    def __init__(self, par, valid_start, value, base_time, span, fhour, duplicates=0):
+        self.par = par
+        self.valid_start = np.asarray(valid_start, dtype=np.int64)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.base_time = np.asarray(base_time, dtype=np.int64)
+        self.span = np.asarray(span, dtype=np.int64)
+        self.fhour = np.asarray(fhour, dtype=np.int64)
+        self.duplicates = duplicates
+
+    @classmethod
+    def fromrecords(cls, par, valid_start, valid_end, value, base_time):
+        """build from one array per field, one entry per line, in any order
+
+        Entries valid before their base_time are dropped.
+        """
+        valid_start = np.asarray(valid_start, dtype=np.int64)
+        valid_end = np.asarray(valid_end, dtype=np.int64)
+        value = np.asarray(value, dtype=np.float64)
+        base_time = np.asarray(base_time, dtype=np.int64)
+        ahead = valid_start >= base_time
+        if not ahead.all():
+            valid_start, valid_end = valid_start[ahead], valid_end[ahead]
+            value, base_time = value[ahead], base_time[ahead]
+        fhour = (valid_start - base_time) // HOUR
+        lead = fhour // 24
+        starts, row = np.unique(valid_start, return_inverse=True)
+        nlead = int(lead.max()) + 1 if len(lead) else 0
+        # keep the first line for each cell, like fdict
+        cell = row * nlead + lead
+        firstcell, first = np.unique(cell, return_index=True)
+        duplicates = len(cell) - len(first)
+
+        shape = (len(starts), nlead)
+        grid = np.full(shape, np.nan)
+        grid.flat[firstcell] = value[first]
+        bt = np.full(shape, NA, dtype=np.int64)
+        bt.flat[firstcell] = base_time[first]
+        span = np.full(shape, NA, dtype=np.int64)
+        span.flat[firstcell] = (valid_end[first] - valid_start[first]) // HOUR
+        fh = np.full(shape, NA, dtype=np.int64)
+        fh.flat[firstcell] = fhour[first]
+        return cls(par, starts, grid, bt, span, fh, duplicates)
+
+    def __len__(self):
+        return len(self.valid_start)
+
+    def __repr__(self):
+        return "<ForecastIndex %s: %d valid_start, %d leads>" % (
+            self.par,
+            len(self),
+            self.value.shape[1],
+        )
+
+    @property
+    def present(self):
+        """True where there is a forecast"""
+        return self.fhour != NA
+
+    def rows(self, kvs):
+        """row of each time in kvs, or -1 if there are no forecasts for it"""
+        kvs = np.asarray(kvs, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(kvs.shape, -1)
+        i = np.searchsorted(self.valid_start, kvs)
+        np.minimum(i, len(self) - 1, out=i)
+        return np.where(self.valid_start[i] == kvs, i, -1)
+
+    def gather(self, kvs, nlead=7, hour=None):
+        """(len(kvs), nlead) forecasts f1 ... fnlead valid at the times kvs
+
+        If hour is given, fn is used only if its fhour is hour + 24*(n-1),
+        as when the notebook fills edict from fdict.  Missing ones are nan.
+        """
+        i = self.rows(kvs)
+        out = np.full((len(i), nlead), np.nan)
+        m = min(nlead, self.value.shape[1])
+        ok = i >= 0
+        out[ok, :m] = self.value[i[ok], :m]
+        if hour is not None:
+            want = hour + 24 * np.arange(m)
+            wrong = np.zeros(out.shape, dtype=bool)
+            wrong[ok, :m] = self.fhour[i[ok], :m] != want
+            out[wrong] = np.nan
+        return out
+
+
+def readforecasts(lines, pars):
+    """a ForecastIndex for each of pars, from one pass over the lines"""
+    fields = {par: ([], [], [], []) for par in pars}
+    for line in lines:
+        q = line.strip().split(",")
+        if len(q) < 6 or q[2] not in fields:
+            continue
+        valid_start, valid_end, value, base_time = fields[q[2]]
+        valid_start.append(int(q[3]))
+        valid_end.append(int(q[4]))
+        value.append(float(q[5]))
+        base_time.append(int(q[-1]))
+    return {par: ForecastIndex.fromrecords(par, *fields[par]) for par in pars}
@@ -0,0 +1,151 @@
+"""daily max, min or total from the raw hourly obs of the Australia study"""
+
+# A line of the raw obs file, like australia_study/12038obs.csv, is
+#
+#   ... , par, valid_start, valid_end, value, unit, statistic, instantaneous ...
+#   q[2]  q[3]         q[4]       q[5]   q[6]  q[7]       q[8]
+#
+# AustraliaVerificationData.ipynb keeps every line for a parameter in obsx,
+# then re-splits 15 of them for each day.  Here the file is read once, line by
+# line, and only the hours of the window being filled are kept:
+#
+# with open(obfile) as obs:
+#     odict = dict(dailyobs(obs, "AIR_TEMP_MAX", spanx=15, starth=22))
+#
+# The lines for a parameter must be in time order, as they are in the files.
+# The first line for a valid_start is used and later ones are counted as
+# duplicates, like obsx in the notebook.  A line whose value is blank, NA
+# or nan is counted as missing and skipped, so its hour is missing too.
+
+import numpy as np
+
+HOUR = 3600
+DAY = 86400
+
+reducers = {"max": max, "min": min, "sum": sum}
+
+
+def defaulthow(lookfor):
+    """max for AIR_TEMP_MAX, min for AIR_TEMP_MIN, otherwise (PRCP) sum"""
+    if "MAX" in lookfor:
+        return "max"
+    if "MIN" in lookfor:
+        return "min"
+    return "sum"
+
+
+def obrecords(lines, lookfor, report=None):
+    """(valid_start, value) for each distinct valid_start of parameter lookfor
+
+    Duplicate lines for the same valid_start are skipped; report, a
+    dictionary, counts them as "duplicate" (same value) or "different".
+    Lines with no value (blank, NA, nan) are skipped and counted as "missing".
+    """
+    if report is None:
+        report = {}
+    report.setdefault("distinct", 0)
+    report.setdefault("duplicate", 0)
+    report.setdefault("different", 0)
+    report.setdefault("missing", 0)
+    last = None  # (valid_start, value) of the last line used
+    for line in lines:
+        q = line.split(",")
+        if len(q) < 6 or q[2] != lookfor:
+            continue
+        valid_start = int(q[3])
+        try:
+            value = float(q[5])
+        except ValueError:
+            value = float("nan")
+        if value != value:
+            report["missing"] += 1
+            continue
+        if last is not None and valid_start == last[0]:
+            report["duplicate" if value == last[1] else "different"] += 1
+            continue
+        if last is not None and valid_start < last[0]:
+            raise ValueError(
+                "%s obs are not in time order at valid_start %d"
+                % (lookfor, valid_start)
+            )
+        last = (valid_start, value)
+        report["distinct"] += 1
+        yield last
+
+
+def _candidates(first, starth=None, starts=None):
+    """the window start times, in order, from the day of first"""
+    if starts is not None:
+        for s in starts:
+            yield int(s)
+        return
+    s = first - first % DAY + starth * HOUR
+    while True:
+        yield s
+        s += DAY
+
+
+def dailyobs(lines, lookfor, spanx=15, starth=None, starts=None, how=None, report=None):
+    """(start, value) for each window of spanx hours with all its hourly obs
+
+    Windows start at hour starth UTC each day, or at each of the sorted
+    times in starts (the forecast valid_start times).  value is the max, min
+    or sum (how) of the spanx hourly values.  Windows missing any hour are
+    not yielded; report["incomplete"] lists their start times.
+    Memory is the hours of one window, however long the file.
+    """
+    if (starth is None) == (starts is None):
+        raise ValueError("give one of starth or starts")
+    reduce = reducers[how or defaulthow(lookfor)]
+    if report is None:
+        report = {}
+    report.setdefault("incomplete", [])
+    report.setdefault("complete", 0)
+    span = (spanx - 1) * HOUR  # from the first hour of a window to its last
+    window = {}  # valid_start -> value, for hours of windows not yet done
+    cands = None
+    s = None  # start of the window being filled
+
+    def finish(s):
+        hours = [window.get(s + n * HOUR) for n in range(spanx)]
+        if None in hours:
+            report["incomplete"].append(s)
+            return None
+        report["complete"] += 1
+        return reduce(hours)
+
+    for t, value in obrecords(lines, lookfor, report):
+        if cands is None:
+            cands = _candidates(t, starth, starts)
+            s = next(cands, None)
+        # every window that ends before t is as full as it will get
+        while s is not None and t > s + span:
+            v = finish(s)
+            if v is not None:
+                yield s, v
+            s = next(cands, None)
+            for old in [h for h in window if s is None or h < s]:
+                del window[old]
+        if s is None:
+            break  # no more windows wanted
+        if t >= s:
+            window[t] = value
+    # the end of the file: finish the last window, and any others that were asked for
+    if s is not None and starts is not None:
+        while s is not None:
+            v = finish(s)
+            if v is not None:
+                yield s, v
+            s = next(cands, None)
+    elif s is not None:
+        v = finish(s)
+        if v is not None:
+            yield s, v
+
+
+def dailyarrays(lines, lookfor, **kw):
+    """dailyobs as two numpy arrays: int64 start times, float64 values"""
+    pairs = list(dailyobs(lines, lookfor, **kw))
+    start = np.array([p[0] for p in pairs], dtype=np.int64)
+    value = np.array([p[1] for p in pairs], dtype=np.float64)
+    return start, value
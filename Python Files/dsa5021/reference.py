@@ -0,0 +1,69 @@
+"""reference forecasts, like persistence, made from the obs in a VerifTable"""
+
+# A reference forecast replaces the model forecasts f1 ... f7 with something
+# simple made from the obs, to compare skill against.  The f1 ... f7 columns
+# are all made at once: fn for day k uses the ob from day k - n.  Days missing
+# from the record, or with a missing ob, give nan.
+#
+#   persistence  fn = ob(k-n)
+#   damped       fn = clim(k) + alpha**n * (ob(k-n) - clim(k-n))
+#   blend        fn = weight * ob(k-n) + (1 - weight) * clim(k)
+
+import numpy as np
+
+DAY = 86400  # seconds
+
+
+def leads(fkeys):
+    """the lead in days of each forecast key: f1 -> 1, f2 -> 2 ..."""
+    return np.array([int(f[1:]) for f in fkeys])
+
+
+def lagged(table, ka, days):
+    """(N, len(days)) array, column j holds table[ka] from days[j] days earlier"""
+    utc = table.utc
+    values = table[ka]
+    if len(utc) == 0:
+        return np.empty((0, len(days)))
+    prior = utc[:, None] - DAY * np.asarray(days)[None, :]
+    i = np.searchsorted(utc, prior)
+    np.minimum(i, len(utc) - 1, out=i)
+    found = utc[i] == prior  # False across a gap in the record
+    return np.where(found, values[i], np.nan)
+
+
+def persistence(table, days):
+    return lagged(table, "ob", days)
+
+
+def damped(table, days, alpha=0.8):
+    anom = lagged(table, "ob", days) - lagged(table, "clim", days)
+    return table.clim[:, None] + alpha ** np.asarray(days)[None, :] * anom
+
+
+def blend(table, days, weight=0.5):
+    priorob = lagged(table, "ob", days)
+    return weight * priorob + (1.0 - weight) * table.clim[:, None]
+
+
+references = {
+    "persistence": persistence,
+    "damped": damped,
+    "blend": blend,
+}
+
+
+def reference(table, kind="persistence", **params):
+    """a VerifTable with f1 ... f7 replaced by a reference forecast
+
+    kind is a key of references.  params go to the reference function,
+    for example alpha for damped, or weight for blend.
+    Only the forecast block is new, utc, ob and clim are shared with table.
+    """
+    if kind not in references:
+        raise ValueError(
+            "unknown reference forecast %r, choose from %s"
+            % (kind, ", ".join(sorted(references)))
+        )
+    fcst = references[kind](table, leads(table.fkeys), **params)
+    return table.replace(fcst=fcst)
@@ -0,0 +1,163 @@
+"""area weighted means over boxes, bands and masks of a lat/lon grid"""
+
+# GriddedSSTData.ipynb averages the 5S-5N band as anomaly[:,75:85,:].mean(1),
+# with indices found by hand and every grid cell counted the same.  Here a
+# RegionIndex for lat1d and lon1d finds the indices and cos(lat) weights of
+# a region once, and keeps them, and the weighted means read the cube a
+# time chunk at a time:
+#
+# grid = RegionIndex(g.lat1d, g.lon1d)
+# band = grid.band(-5, 5)                       # 5S-5N, all longitudes
+# grid.mean(anomaly, band)                       # (time,) weighted mean
+# grid.hovmoller(anomaly, band)                  # (time, lon) section
+# grid.nino34(g.cube, clim)                      # Nino-3.4 index
+# grid.means(anomaly, ["nino3", "nino34", "nino4"])   # all in one read
+#
+# Boxes are (south, north, west, east) in degrees, and may cross the
+# dateline or 0E, e.g. (-10, 10, 350, 20), whatever the lon1d convention.
+# cube can be a dsa5021.gridded.LazyCube or a (time, lat, lon) array.
+
+import numpy as np
+
+from .gridded import LazyCube
+
+boxes = {
+    "nino12": (-10, 0, 270, 280),
+    "nino3": (-5, 5, 210, 270),
+    "nino34": (-5, 5, 190, 240),
+    "nino4": (-5, 5, 160, 210),
+    "tropics": (-23.5, 23.5, 0, 360),
+}
+
+
+class Region:
+    """a bounding box of grid indices, and the area weights inside it"""
+
+    def __init__(self, lats, lons, weights):
+        self.lats = lats  # slice of lat1d
+        self.lons = lons  # slice of lon1d
+        self.weights = weights  # (lat, lon) cos(lat), 0 outside the region
+
+    def __repr__(self):
+        return "<Region lat %d:%d lon %d:%d, %d cells>" % (
+            self.lats.start,
+            self.lats.stop,
+            self.lons.start,
+            self.lons.stop,
+            np.count_nonzero(self.weights),
+        )
+
+
+def _bounds(inside):
+    where = np.nonzero(inside)[0]
+    if len(where) == 0:
+        return slice(0, 0)
+    return slice(int(where[0]), int(where[-1]) + 1)
+
+
+def weightedmean(block, weights, axis=(-2, -1)):
+    """mean of a masked (..., lat, lon) block, weighted, over axis"""
+    block = np.ma.asarray(block, dtype=np.float64)
+    w = np.where(np.ma.getmaskarray(block), 0.0, weights)
+    total = (block.filled(0.0) * w).sum(axis=axis)
+    wsum = w.sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.ma.masked_where(wsum == 0, total / wsum)
+
+
+class RegionIndex:
+    """regions of one lat1d/lon1d grid, made once and kept by their bounds"""
+
+    def __init__(self, lat1d, lon1d):
+        self.lat1d = np.asarray(lat1d, dtype=np.float64)
+        self.lon1d = np.asarray(lon1d, dtype=np.float64)
+        self.coslat = np.cos(np.radians(self.lat1d))
+        self.cache = {}
+
+    def _region(self, inlat, inlon, key):
+        lats, lons = _bounds(inlat), _bounds(inlon)
+        weights = (self.coslat * inlat)[lats, None] * inlon[None, lons]
+        region = Region(lats, lons, weights)
+        self.cache[key] = region
+        return region
+
+    def box(self, south, north, west, east):
+        """cells with centres in south <= lat <= north, west <= lon <= east"""
+        key = ("box", south, north, west, east)
+        if key in self.cache:
+            return self.cache[key]
+        inlat = (self.lat1d >= south) & (self.lat1d <= north)
+        if east - west >= 360:
+            inlon = np.ones(len(self.lon1d), dtype=bool)
+        else:
+            inlon = (self.lon1d - west) % 360 <= (east - west) % 360
+        return self._region(inlat, inlon, key)
+
+    def band(self, south, north):
+        """all longitudes between two latitudes"""
+        return self.box(south, north, 0, 360)
+
+    def mask(self, mask, name):
+        """cells where a (lat, lon) boolean mask is True, kept as name"""
+        key = ("mask", name)
+        if key in self.cache:
+            return self.cache[key]
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(self.lat1d), len(self.lon1d)):
+            raise ValueError("mask %s does not fit the grid" % (mask.shape,))
+        region = self._region(mask.any(1), mask.any(0), key)
+        region.weights = region.weights * mask[region.lats, region.lons]
+        return region
+
+    def region(self, region):
+        """a Region, from itself, a name in boxes, or a (south, north, west, east)"""
+        if isinstance(region, Region):
+            return region
+        if isinstance(region, str):
+            return self.box(*boxes[region])
+        return self.box(*region)
+
+    def means(self, cube, regions):
+        """{region: (time,) weighted mean} for each region, reading cube once
+
+        Each time chunk of the box around all the regions is read, and every
+        region averaged from it.
+        """
+        if not isinstance(cube, LazyCube):
+            cube = LazyCube(np.ma.asarray(cube))
+        found = [self.region(r) for r in regions]
+        lats = slice(min(r.lats.start for r in found), max(r.lats.stop for r in found))
+        lons = slice(min(r.lons.start for r in found), max(r.lons.stop for r in found))
+        parts = {r: [] for r in regions}
+        for start, block in cube[:, lats, lons].blocks():
+            for name, r in zip(regions, found):
+                sub = block[
+                    :,
+                    r.lats.start - lats.start : r.lats.stop - lats.start,
+                    r.lons.start - lons.start : r.lons.stop - lons.start,
+                ]
+                parts[name].append(weightedmean(sub, r.weights))
+        return {name: np.ma.concatenate(parts[name]) for name in regions}
+
+    def mean(self, cube, region):
+        """(time,) weighted mean of cube over a region"""
+        return self.means(cube, [region])[region]
+
+    def hovmoller(self, cube, region, along="lon"):
+        """(time, lon) section, weighted over latitude, or (time, lat) with along="lat" """
+        r = self.region(region)
+        if not isinstance(cube, LazyCube):
+            cube = LazyCube(np.ma.asarray(cube))
+        axis = {"lon": -2, "lat": -1}[along]
+        parts = [
+            weightedmean(block, r.weights, axis=axis)
+            for start, block in cube[:, r.lats, r.lons].blocks()
+        ]
+        return np.ma.concatenate(parts)
+
+    def nino34(self, cube, clim=None):
+        """Nino-3.4 series: mean over 5S-5N, 170W-120W, of anomalies if clim
+        (a dsa5021.climatology.Climatology) is given"""
+        if clim is not None:
+            cube = clim.anomaly(cube)
+        return self.mean(cube, "nino34")
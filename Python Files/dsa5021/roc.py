@@ -0,0 +1,140 @@
+"""ROC curve, its area (AUC), and relative value, for probability forecasts"""
+
+# For a threshold t, ForecastProbabilitySkill.ipynb forecasts rain when
+# PoP > t and counts (Wilks Fig 7.1)
+#
+#   a  hits, TP             b  false alarms, FP
+#   c  misses, FN           d  correct negatives, TN
+#
+# hit rate a/(a+c) against false alarm rate b/(b+d) is the ROC curve.  The
+# notebook loops over every PoP for every threshold.  Here the distinct
+# probabilities are sorted once, with the count of forecasts and of rain
+# events at each, and every threshold is a searchsorted into their
+# cumulative sums.  The probabilities need not be rounded into categories:
+#
+# curve = roc(prob, rained)                  # any probabilities
+# curve = rocbinned(sums["count"][0], sums["hits"][0])   # as the notebook
+# rv, rvmax = relativevalue(curve, climo=obar)
+
+import numpy as np
+
+from .probskill import COMMON, pops, probcounts
+from .skill import validmask
+
+cls = np.arange(1, 100) / 100.0  # cost/loss ratios for the relative value curves
+
+
+def _rocpoints(values, count, hits, thresholds):
+    """a, b, c, d for each threshold, from sorted distinct values with the
+    number of forecasts and of rain events at each"""
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    ch = np.concatenate([[0], np.cumsum(hits)])
+    cn = np.concatenate([[0], np.cumsum(count - hits)])
+    k = np.searchsorted(values, thresholds, side="right")  # values <= threshold
+    c = ch[k]
+    d = cn[k]
+    a = ch[-1] - c
+    b = cn[-1] - d
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hitrate = a / (a + c)
+        farate = b / (b + d)
+    return {
+        "thresholds": thresholds,
+        "a": a,
+        "b": b,
+        "c": c,
+        "d": d,
+        "hitrate": hitrate,
+        "farate": farate,
+        "auc": auc(hitrate, farate),
+    }
+
+
+def auc(hitrate, farate):
+    """area under the ROC curve, by the trapezoidal rule"""
+    hitrate = np.asarray(hitrate, dtype=np.float64)
+    farate = np.asarray(farate, dtype=np.float64)
+    return -0.5 * np.sum((hitrate[1:] + hitrate[:-1]) * np.diff(farate))
+
+
+def roc(prob, rained, thresholds=None):
+    """ROC curve for probabilities prob, 1-D, and events rained (True or 1)
+
+    By default the thresholds are -0.001 and each distinct probability, so
+    the curve goes through every point the forecasts can make.
+    Returns a dictionary of arrays over the thresholds: thresholds, a, b, c,
+    d, hitrate, farate, and the AUC.
+    """
+    prob = np.asarray(prob, dtype=np.float64)
+    rained = np.asarray(rained).astype(np.int64)
+    values, inv = np.unique(prob, return_inverse=True)
+    count = np.bincount(inv, minlength=len(values))
+    hits = np.bincount(inv, weights=rained, minlength=len(values)).astype(np.int64)
+    if thresholds is None:
+        thresholds = np.concatenate([[-0.001], values])
+    return _rocpoints(values, count, hits, thresholds)
+
+
+def rocbinned(count, hits, thresholds=None):
+    """ROC curve from the PoP category counts of probskill.probcounts, one lead
+
+    The thresholds are those of the notebook: -0.001, and 0.05 above each
+    PoP category that has forecasts.
+    """
+    count = np.asarray(count)
+    hits = np.asarray(hits)
+    if thresholds is None:
+        thresholds = np.concatenate([[-0.001], pops[count > 0] + 0.05])
+    return _rocpoints(pops, count, hits, thresholds)
+
+
+def relativevalue(curve, climo, cls=cls):
+    """(thresholds, C/L) relative value matrix, and its envelope over thresholds
+
+    climo is the climatological frequency of the event; the notebook uses the
+    sample frequency obar.  Wilks' value score, with costs divided by L.
+    """
+    a, b, c, d = (curve[k][:, None].astype(np.float64) for k in "abcd")
+    n = a + b + c + d
+    cl = np.asarray(cls, dtype=np.float64)[None, :]
+    expense = cl * (a / n + b / n) + c / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rv = np.where(
+            cl < climo,
+            (expense - cl) / (cl * climo - cl),
+            (expense - climo) / (cl * climo - climo),
+        )
+    return rv, rv.max(axis=0)
+
+
+def rocskill(table, raintrigger=1, mask=None, common=COMMON, binned=True):
+    """ROC curve and relative value for each lead of a PoP VerifTable
+
+    Returns a list, one dictionary per forecast column, with the curve,
+    plus rv, rvmax and climo (the sample frequency of rain).  binned=True
+    rounds PoP to 0.1 as the notebook does, otherwise every PoP is used.
+    The days scored are those of dsa5021.probskill.brierskill, by default
+    the notebook's: ob, clim, f1 and f2 all good.
+    """
+    sums = probcounts(
+        table.ob,
+        table.fcst / 100.0,
+        table.clim / 100.0,
+        raintrigger=raintrigger,
+        mask=mask,
+        common=common,
+    )
+    curves = []
+    if not binned:
+        valid = validmask(table.ob, table.fcst, table.clim, mask=mask, common=common)
+        rained = table.ob >= raintrigger
+    for j in range(len(table.fkeys)):
+        if binned:
+            curve = rocbinned(sums["count"][j], sums["hits"][j])
+        else:
+            ok = valid[:, j]
+            curve = roc(table.fcst[ok, j] / 100.0, rained[ok])
+        curve["climo"] = sums["hits"][j].sum() / sums["n"][j]
+        curve["rv"], curve["rvmax"] = relativevalue(curve, curve["climo"])
+        curves.append(curve)
+    return curves
@@ -0,0 +1,101 @@
+"""skill as a function of time: rolling windows, and by month or season"""
+
+# A rolling window of w days ending at day k contains the rows with utc in
+# (utc[k] - w*86400, utc[k]].  The window sums come from differences of
+# cumulative sums, so a daily series costs O(N) for each lead, however long
+# the window.  Gaps in the record just make a window hold fewer days.
+#
+# Monthly and seasonal scores come from np.bincount over a group number,
+# one pass for all the groups and leads together.
+
+import numpy as np
+
+from .skill import validmask
+
+DAY = 86400  # seconds
+
+seasons = ["DJF", "MAM", "JJA", "SON"]
+monthnames = "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split()
+
+
+def _scores(n, se2, sae, sec2, saec, minn):
+    """rmse, mae and skill from sums, nan where fewer than minn days"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = np.where(n >= minn, n, np.nan)
+        rmse = np.sqrt(se2 / n)
+        mae = sae / n
+        rmsec = np.sqrt(sec2 / n)
+        maec = saec / n
+        return {
+            "rmse": rmse,
+            "mae": mae,
+            "rmse_skill": 1.0 - rmse / rmsec,
+            "mae_skill": 1.0 - mae / maec,
+            "rmse_clim": rmsec,
+            "mae_clim": maec,
+        }
+
+
+def _errors(table, mask=None, common=False):
+    valid = validmask(table.ob, table.fcst, table.clim, mask=mask, common=common)
+    ob = table.ob[:, None]
+    e = np.where(valid, table.fcst - ob, 0.0)
+    ec = np.where(valid, table.clim[:, None] - ob, 0.0)
+    return [valid.astype(np.float64), e * e, np.abs(e), ec * ec, np.abs(ec)]
+
+
+def rollingskill(table, window=30, minn=None, mask=None, common=False):
+    """scores in a window of days ending at each row of table
+
+    Returns a dictionary of (N, L) arrays: n, rmse, mae, rmse_skill,
+    mae_skill, rmse_clim, mae_clim.  Windows with fewer than minn scored days
+    (default: half the window) are nan.
+    """
+    if minn is None:
+        minn = max(1, window // 2)
+    start = np.searchsorted(table.utc, table.utc - window * DAY, side="right")
+    end = np.arange(1, len(table) + 1)
+    sums = []
+    for x in _errors(table, mask=mask, common=common):
+        cs = np.zeros((len(x) + 1, x.shape[1]))
+        np.cumsum(x, axis=0, out=cs[1:])
+        sums.append(cs[end] - cs[start])
+    n = np.rint(sums[0])  # counts are exact, but the differences may not be
+    scores = _scores(n, *sums[1:], minn=minn)
+    scores["n"] = n.astype(np.int64)
+    return scores
+
+
+def groupnumbers(utc, by="month"):
+    """group number of each utc, and the group labels
+
+    by is "month" (0 is January) or "season" (0 is DJF).
+    """
+    # months since 1970, then the calendar month 0 ... 11
+    month = np.asarray(utc).astype("datetime64[s]").astype("datetime64[M]")
+    month = month.astype(np.int64) % 12
+    if by == "month":
+        return month, list(monthnames)
+    if by == "season":
+        return ((month + 1) % 12) // 3, list(seasons)
+    raise ValueError("by must be month or season, not %r" % by)
+
+
+def groupskill(table, by="month", minn=1, mask=None, common=False):
+    """scores for each month or season: dictionary of (G, L) arrays
+
+    The dictionary also has "groups", the list of G labels.
+    """
+    group, labels = groupnumbers(table.utc, by)
+    ng = len(labels)
+    nlead = len(table.fkeys)
+    # one bincount does every group and lead: bin = group * nlead + lead
+    bins = (group[:, None] * nlead + np.arange(nlead)[None, :]).ravel()
+    sums = [
+        np.bincount(bins, weights=x.ravel(), minlength=ng * nlead).reshape(ng, nlead)
+        for x in _errors(table, mask=mask, common=common)
+    ]
+    scores = _scores(*sums, minn=minn)
+    scores["n"] = sums[0].astype(np.int64)
+    scores["groups"] = labels
+    return scores
@@ -0,0 +1,96 @@
+"""error statistics and skill scores for all forecast lead times at once"""
+
+# The obs are a vector of length N, the forecasts are an (N, L) matrix with
+# a column for each lead time f1 ... f7.  Every statistic is computed for all
+# L columns in one pass of array arithmetic.  Skill is relative to
+# climatology, scored on the same days as the forecast:
+#
+#   RMSE skill = 1 - RMSE(forecast) / RMSE(clim)
+#   MAE skill = 1 - MAE(forecast) / MAE(clim)
+
+import numpy as np
+
+metrics = [
+    "n",
+    "rmse",
+    "mae",
+    "bias",
+    "corr",
+    "rmse_skill",
+    "mae_skill",
+    "rmse_clim",
+    "mae_clim",
+]
+
+
+def validmask(ob, fcst, clim, mask=None, common=True):
+    """(N, L) boolean array of which forecasts to score
+
+    mask, if given, is True for good values of fcst, otherwise nan is missing.
+    A forecast is scored only if its ob and clim are also good.
+    With common=True, a day is scored only if all L forecasts are good,
+    which is the set of gkeys in ForecastSkill.py.  With common=k, a number,
+    only if the first k are, like the gkeys of ForecastProbabilitySkill.ipynb
+    (f1 and f2, k=2).
+    """
+    if mask is None:
+        mask = ~np.isnan(fcst)
+    valid = mask & ~np.isnan(ob)[:, None] & ~np.isnan(clim)[:, None]
+    if common is True:
+        valid = valid & valid.all(axis=1, keepdims=True)
+    elif common:
+        valid = valid & valid[:, :common].all(axis=1, keepdims=True)
+    return valid
+
+
+def skillscores(ob, fcst, clim, mask=None, common=True):
+    """dictionary of length L arrays, one value for each lead time
+
+    keys are n, rmse, mae, bias, corr, rmse_skill, mae_skill, and
+    rmse_clim, mae_clim for climatology scored on the same days.
+    bias is the mean of forecast minus ob.
+    """
+    ob = np.asarray(ob, dtype=np.float64)
+    clim = np.asarray(clim, dtype=np.float64)
+    fcst = np.asarray(fcst, dtype=np.float64)
+    if fcst.ndim == 1:
+        fcst = fcst[:, None]
+    valid = validmask(ob, fcst, clim, mask=mask, common=common)
+    w = valid.astype(np.float64)
+    n = w.sum(axis=0)
+
+    # zero the errors that are not scored, nan times 0 is still nan
+    o = np.where(valid, ob[:, None], 0.0)
+    f = np.where(valid, fcst, 0.0)
+    c = np.where(valid, clim[:, None], 0.0)
+    e = f - o
+    ec = c - o
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bias = e.sum(axis=0) / n
+        rmse = np.sqrt((e * e).sum(axis=0) / n)
+        mae = np.abs(e).sum(axis=0) / n
+        rmsec = np.sqrt((ec * ec).sum(axis=0) / n)
+        maec = np.abs(ec).sum(axis=0) / n
+        fa = (f - f.sum(axis=0) / n) * w  # anomalies from the mean, on valid days
+        oa = (o - o.sum(axis=0) / n) * w
+        corr = (fa * oa).sum(axis=0) / np.sqrt(
+            (fa * fa).sum(axis=0) * (oa * oa).sum(axis=0)
+        )
+        scores = {
+            "n": n.astype(np.int64),
+            "rmse": rmse,
+            "mae": mae,
+            "bias": bias,
+            "corr": corr,
+            "rmse_skill": 1.0 - rmse / rmsec,
+            "mae_skill": 1.0 - mae / maec,
+            "rmse_clim": rmsec,
+            "mae_clim": maec,
+        }
+    return scores
+
+
+def skilltable(table, mask=None, common=True):
+    """skillscores for every forecast column of a VerifTable"""
+    return skillscores(table.ob, table.fcst, table.clim, mask=mask, common=common)
@@ -0,0 +1,228 @@
+"""columnar reader for the verification files: utc ob clim f1 f2 ... f7"""
+
+# A verification file, like 09021_AIR_TEMP_MAX.csv, looks like this:
+#
+#    utc      ob   clim   f1    f2    f3    f4    f5    f6    f7
+# 1430431200 22.5  25.7   NA    NA    NA    NA    NA    NA    NA
+# 1430604000 22.4  21.8  21.2   NA    NA    NA    NA    NA    NA
+#
+# Instead of a dictionary of dictionaries (edictf), the file is held as a few
+# numpy arrays: utc is int64, ob and clim are float64, and the forecasts are one
+# float64 array with a column for each lead time. "NA" becomes NaN.
+#
+# writeverif writes a table back out in the same fixed-width layout the
+# export cells of AustraliaVerificationData.ipynb (temperature) and
+# AustraliaRainfallVerificationData.ipynb (PoP) use.
+
+import os
+
+import numpy as np
+
+MISSING = "NA"  # how a missing value is written in the files
+
+siteinfo = {
+    "31011": "CAIRNS AERO",
+    "12038": "KALGOORLIE-BOULDER AIRPORT",
+    "09021": "PERTH AIRPORT",
+}
+
+
+class VerifTable:
+    """columns of one verification file, rows sorted by utc"""
+
+    def __init__(self, utc, ob, clim, fcst, fkeys, utcsep=None):
+        self.utc = np.asarray(utc, dtype=np.int64)
+        self.ob = np.asarray(ob, dtype=np.float64)
+        self.clim = np.asarray(clim, dtype=np.float64)
+        self.fcst = np.asarray(fcst, dtype=np.float64)  # shape (len(utc), len(fkeys))
+        self.fkeys = list(fkeys)
+        # what followed utc in the file read, for writeverif; None if unknown
+        self.utcsep = utcsep
+        n = len(self.utc)
+        if self.ob.shape != (n,) or self.clim.shape != (n,):
+            raise ValueError("ob and clim must have one value per utc")
+        if self.fcst.shape != (n, len(self.fkeys)):
+            raise ValueError(
+                "fcst must have shape %r, not %r"
+                % ((n, len(self.fkeys)), self.fcst.shape)
+            )
+
+    def __len__(self):
+        return len(self.utc)
+
+    def __getitem__(self, ka):
+        # ka = utc, ob, clim, or f1, ... , like the inner keys of edictf
+        if ka == "utc":
+            return self.utc
+        if ka == "ob":
+            return self.ob
+        if ka == "clim":
+            return self.clim
+        if ka in self.fkeys:
+            return self.fcst[:, self.fkeys.index(ka)]
+        raise KeyError(ka)
+
+    def __repr__(self):
+        return "<VerifTable %d rows, columns: %s>" % (
+            len(self),
+            " ".join(self.colnames),
+        )
+
+    @property
+    def colnames(self):
+        return ["utc", "ob", "clim"] + self.fkeys
+
+    def replace(self, **columns):
+        """a new table sharing every array except the ones given"""
+        kw = dict(
+            utc=self.utc,
+            ob=self.ob,
+            clim=self.clim,
+            fcst=self.fcst,
+            fkeys=self.fkeys,
+            utcsep=self.utcsep,
+        )
+        kw.update(columns)
+        return VerifTable(**kw)
+
+
+def splitname(filename):
+    """sitenum and varname from a file name like 09021_AIR_TEMP_MAX.csv"""
+    base = os.path.basename(filename)
+    stem = base[:-4] if base.endswith(".csv") else base
+    sitenum, sep, varname = stem.partition("_")
+    if not sep or not sitenum.isdigit() or not varname:
+        raise ValueError("%s is not named like <site>_<VAR>.csv" % filename)
+    return sitenum, varname
+
+
+def _utcsep(line, layout):
+    """what a data line has between utc and the ob field of layout"""
+    words = line.split()
+    if len(words) < 2:
+        return None
+    rest = line[line.index(words[0]) + len(words[0]) :]
+    fmt, na = layouts[layout]["ob"]
+    field = na if words[1] == MISSING else fmt % float(words[1])
+    gap = len(rest) - len(rest.lstrip(" "))
+    return " " * max(0, gap - (len(field) - len(field.lstrip(" "))))
+
+
+def readverif(filename):
+    """read a verification file into a VerifTable
+
+    The table's utcsep is what the file has after utc, so writeverif gives
+    back the same layout.
+    """
+    with open(filename) as f:
+        colnames = f.readline().split()
+        text = f.read()
+    words = np.array(text.split())
+    if colnames[:3] != ["utc", "ob", "clim"]:
+        raise ValueError("%s: unexpected header %r" % (filename, colnames))
+    ncol = len(colnames)
+    if words.size % ncol:
+        raise ValueError("%s: rows do not all have %d columns" % (filename, ncol))
+    words[words == MISSING] = "nan"
+    values = words.astype(np.float64).reshape(-1, ncol)
+    # epoch seconds are exact in float64, so this round trip is safe
+    utc = values[:, 0].astype(np.int64)
+    if np.any(np.diff(utc) < 0):
+        order = np.argsort(utc, kind="stable")
+        values = values[order]
+        utc = utc[order]
+    return VerifTable(
+        utc,
+        values[:, 1],
+        values[:, 2],
+        values[:, 3:],
+        colnames[3:],
+        _utcsep(text[: text.find("\n")], layoutof(filename)),
+    )
+
+
+# the export cells' z(x) and zi(x) formats, and what they write for "NA"
+layouts = {
+    "temp": {
+        "header": "   utc      ob   clim   f1    f2    f3    f4    f5    f6    f7",
+        "ob": ("% .1f ", "  NA  "),
+        "col": ("% .1f ", "  NA  "),
+        "integer": False,
+        "utcsep": "",
+    },
+    "pop": {
+        "header": "   utc         ob   clim   f1    f2    f3    f4    f5    f6    f7",
+        "ob": ("% 6.1f ", "   NA  "),
+        "col": ("%5.0f ", "   NA "),  # "{:5d} ".format(int(x))
+        "integer": True,
+        "utcsep": " ",
+    },
+}
+
+
+def layoutof(filename):
+    """ "pop" for a PoP file like 31011_DailyPoP1.csv, otherwise "temp" """
+    return "pop" if "PoP" in os.path.basename(filename) else "temp"
+
+
+def writeverif(filename, table, layout=None, utcsep=None, binary=False):
+    """write table as a verification file, in the layout of the exported csv files
+
+    layout is "temp" or "pop"; by default "pop" if the file name has PoP in it.
+    utcsep follows the utc column; by default the one of the file the table
+    was read from, or else that of the layout (some files have none).
+    binary=True also saves the columns as a colcache .cols directory.
+    The whole file is made with one % formatting of every value, so the time
+    goes into writing, not into formatting value by value.
+    """
+    if layout is None:
+        layout = layoutof(filename)
+    lay = layouts[layout]
+    if utcsep is None:
+        utcsep = table.utcsep if table.utcsep is not None else lay["utcsep"]
+    if lay["header"].split()[3:] != table.fkeys:
+        raise ValueError("the %s layout has columns %s" % (layout, lay["header"]))
+    n = len(table)
+    values = np.column_stack([table.utc, table.ob, table.clim, table.fcst])
+    if lay["integer"]:
+        values[:, 2:] = np.trunc(values[:, 2:]) + 0.0  # no "-0" from -0.4
+    missing = np.isnan(values)
+    # a format for each cell: a number, or the literal NA text
+    fmt = np.empty((n, values.shape[1] + 1), dtype=object)
+    fmt[:, 0] = "%d" + utcsep
+    fmt[:, 1] = np.where(missing[:, 1], lay["ob"][1], lay["ob"][0])
+    fmt[:, 2:-1] = np.where(missing[:, 2:], lay["col"][1], lay["col"][0])
+    fmt[:, -1] = "\n"
+    text = "".join(fmt.ravel().tolist()) % tuple(values[~missing].tolist())
+    with open(filename, "w") as f:
+        f.write(lay["header"] + "\n")
+        f.write(text)
+    if binary:
+        from .colcache import writecache
+
+        writecache(filename, table)
+    return filename
+
+
+def goodrows(table, cols=None):
+    """boolean array, True where none of cols is missing (default: all columns)"""
+    if cols is None:
+        cols = table.colnames[1:]
+    good = np.ones(len(table), dtype=bool)
+    for ka in cols:
+        good &= ~np.isnan(table[ka])
+    return good
+
+
+def getv(table, rows, ka):
+    """values of column ka for the selected rows (a boolean mask or indices)"""
+    return table[ka][rows]
+
+
+def meane(a, b):
+    """root mean square error and mean absolute error between a and b"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    assert a.shape == b.shape
+    d = a - b
+    return np.sqrt(np.mean(d * d)), np.mean(np.abs(d))
@@ -3,25 +3,15 @@
 ##############################################
 
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime as dt
 import os
-from urllib.request import urlopen
+from dsa5021.fetch import grabfile
+from dsa5021.skill import skillscores
+from dsa5021.verifdata import siteinfo, splitname
+from dsa5021.colcache import loadverif
 
-
-def grabfile(urlfront, filename, filedir=""):  # filedir could be data/, for example
-    urlpath = urlfront + filename
-    filepath = filedir + filename
-    if os.path.exists(filepath):
-        print(filepath, " already exists.  Delete it, if you want to overwrite.")
-        return
-    with urlopen(urlpath) as response:
-        body = response.read()
-    with open(filepath, "wb") as f:
-        f.write(body)
-    print("downloaded " + urlpath + " to " + filepath)
-    return
+# grabfile, for automatically downloading data files, is in dsa5021.fetch
 
 
 ##############################################
@@ -29,11 +19,6 @@ def grabfile(urlfront, filename, filedir=""):  # filedir could be data/, for exa
 ##############################################
 
 yourname = "Vignesh Murugan"  # This label is put on your figures
-siteinfo = {
-    "31011": "CAIRNS AERO",
-    "12038": "KALGOORLIE-BOULDER AIRPORT",
-    "09021": "PERTH AIRPORT",
-}
 filenames = [
     "31011_AIR_TEMP_MAX.csv",
     "12038_AIR_TEMP_MAX.csv",
@@ -54,27 +39,26 @@ else:
     print(f"You already have {infilename}")
 
 # Extract site information
-sitenum = infilename.split("_")[0]
+sitenum, varname = splitname(infilename)
 sitename = siteinfo[sitenum]
-varname = infilename[len(sitenum) + 1 : -4]
 print(f"This is what you are studying:\n{sitenum}\n{sitename}\n{varname}")
 
 ##############################################
 # Data Loading and Cleaning
 ##############################################
 
-# Load the data into a Pandas DataFrame
-df = pd.read_csv(infilename, delim_whitespace=True)
-
-# Rename columns for better clarity
-df.columns = ["epoch", "ob", "clim", "f1", "f2", "f3", "f4", "f5", "f6", "f7"]
+# Load the data into a Pandas DataFrame, through the binary cache of the csv
+vt = loadverif(infilename)
+df = pd.DataFrame(vt.fcst, columns=vt.fkeys)
+df.insert(0, "epoch", vt.utc)
+df.insert(1, "ob", vt.ob)
+df.insert(2, "clim", vt.clim)
 
 # Convert epoch to human-readable date
 df["date"] = pd.to_datetime(df["epoch"], unit="s")
 df.set_index("date", inplace=True)
 
-# Replace "NA" with NaN and drop rows with missing values
-df.replace("NA", np.nan, inplace=True)
+# "NA" is already NaN, drop rows with missing values
 df = df.dropna().astype(float)
 df
 
@@ -83,23 +67,15 @@ df
 ##############################################
 
 
-# Root Mean Square Error and Mean Absolute Error calculations
-def calculate_errors(obs, pred):
-    rmse = np.sqrt(np.mean((obs - pred) ** 2))
-    mae = np.mean(np.abs(obs - pred))
-    return rmse, mae
-
-
-# Calculate RMSE and MAE for climatology
-rmse_clim, mae_clim = calculate_errors(df["ob"], df["clim"])
+# Root Mean Square Error and Mean Absolute Error, and skill against climatology,
+# for all the forecasts (f1 to f7) at once
+fcols = ["f1", "f2", "f3", "f4", "f5", "f6", "f7"]
+scores = skillscores(df["ob"].values, df[fcols].values, df["clim"].values)
+rmse_clim, mae_clim = scores["rmse_clim"][0], scores["mae_clim"][0]
 print(f"RMSE (Clim): {rmse_clim:.3f}, MAE (Clim): {mae_clim:.3f}")
 
-# Evaluate RMSE and MAE for forecasts (f1 to f7)
-skills = []
-for col in ["f1", "f2", "f3", "f4", "f5", "f6", "f7"]:
-    rmse, mae = calculate_errors(df["ob"], df[col])
-    skill_score = 1 - (rmse / rmse_clim)  # RMSE skill score
-    skills.append(skill_score)
+skills = list(scores["rmse_skill"])  # RMSE skill score
+for col, rmse, skill_score in zip(fcols, scores["rmse"], skills):
     print(f"{col}: RMSE = {rmse:.3f}, Skill = {skill_score:.3f}")
 
 ##############################################
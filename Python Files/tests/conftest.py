@@ -0,0 +1,8 @@
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+# the verification files exported for the notebooks
+datadir = os.path.join(os.path.dirname(os.path.dirname(here)), "dsa5021-main")
@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+from conftest import datadir
+from dsa5021.accum import SkillAccumulator
+
+
+def test_appendfile_refuses_pop():
+    acc = SkillAccumulator()
+    with pytest.raises(ValueError):
+        acc.appendfile(os.path.join(datadir, "31011_DailyPoP1.csv"))
+    assert acc.keys() == []
+    assert acc.appendfile(os.path.join(datadir, "09021_AIR_TEMP_MAX.csv")) > 0
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from conftest import datadir
+from dsa5021 import batch
+from dsa5021.__main__ import findall
+
+
+def test_findfiles_leaves_out_pop():
+    found = [os.path.basename(p) for p in batch.findfiles(datadir)]
+    assert "09021_AIR_TEMP_MAX.csv" in found
+    assert not [f for f in found if "PoP" in f]
+    pop = batch.findfiles(datadir, layout="pop")
+    assert [os.path.basename(p) for p in pop] == [
+        "31011_DailyPoP1.csv",
+        "31011_DailyPoP10.csv",
+    ]
+
+
+def test_scorefile_refuses_pop():
+    with pytest.raises(ValueError):
+        batch.scorefile(os.path.join(datadir, "31011_DailyPoP1.csv"))
+
+
+def test_runbatch_has_no_pop_rows():
+    rows = batch.runbatch(batch.findfiles(datadir), workers=1)
+    assert rows and not [row for row in rows if "PoP" in row[1]]
+
+
+def test_command_line_finds_pop_for_brier_scores():
+    assert len(findall([datadir], ["DailyPoP1", "DailyPoP10"])) == 2
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from dsa5021.climatology import Climatology
+from dsa5021.gridded import LazyCube
+
+nyear, nlat, nlon = 4, 5, 6
+
+
+def stack(seed=2):
+    rng = np.random.default_rng(seed)
+    data = 290.0 + 5.0 * rng.standard_normal((12 * nyear, nlat, nlon))
+    mask = rng.random(data.shape) < 0.2
+    mask[:, 0, 0] = True  # land
+    mask[:, 1, 1] = False
+    mask[1::12, 1, 1] = True
+    mask[12 + 1, 1, 1] = False  # one February at 1, 1
+    return np.ma.masked_where(mask, data)
+
+
+def bymonth(data, firstmonth=0):
+    """the time steps of each calendar month, 0 is January"""
+    return [data[(m - firstmonth) % 12 :: 12] for m in range(12)]
+
+
+@pytest.mark.parametrize("chunk", [5, 12, 48])
+@pytest.mark.parametrize("firstmonth", [0, 7])
+def test_welford_is_numpy(chunk, firstmonth):
+    data = stack()
+    clim = Climatology.fromcube(LazyCube(data), firstmonth, chunk=chunk)
+    assert clim.ntime == len(data)
+    for m, months in enumerate(bymonth(data, firstmonth)):
+        np.testing.assert_array_equal(clim.n[m], months.count(axis=0))
+        for got, want in [
+            (clim.mean[m], months.mean(axis=0)),
+            (clim.std()[m], months.std(axis=0, ddof=1)),
+            (clim.std(ddof=0)[m], months.std(axis=0)),
+            (clim.min[m], months.min(axis=0)),
+            (clim.max[m], months.max(axis=0)),
+        ]:
+            np.testing.assert_array_equal(
+                np.ma.getmaskarray(got), np.ma.getmaskarray(want)
+            )
+            np.testing.assert_allclose(got.compressed(), want.compressed(), rtol=1e-12)
+
+
+def test_masked_points():
+    clim = Climatology.fromcube(LazyCube(stack()))
+    assert clim.mean[:, 0, 0].mask.all()
+    assert clim.std()[:, 0, 0].mask.all()
+    # one February at 1, 1: a mean, but too few for a standard deviation
+    assert clim.n[1, 1, 1] == 1
+    assert not clim.mean.mask[1, 1, 1]
+    assert clim.std().mask[1, 1, 1]
+    assert clim.std(ddof=0)[1, 1, 1] == 0.0
+
+
+def test_add_in_pieces():
+    data = stack()
+    whole = Climatology(data.shape[1:])
+    whole.add(data)
+    pieces = Climatology(data.shape[1:])
+    for a in range(0, len(data), 7):
+        pieces.add(data[a : a + 7])
+    np.testing.assert_allclose(pieces.mean.filled(0), whole.mean.filled(0), rtol=1e-12)
+    np.testing.assert_allclose(pieces.m2, whole.m2, rtol=1e-9, atol=1e-9)
+    with pytest.raises(ValueError):
+        whole.add(data[:, 1:])
+
+
+def test_anomaly_and_standardized():
+    data = stack()
+    clim = Climatology.fromcube(LazyCube(data), firstmonth=3)
+    months = (3 + np.arange(len(data))) % 12
+    want = data - clim.mean[months]
+    got = clim.anomaly(LazyCube(data))[2:30:3, 1:]
+    np.testing.assert_allclose(
+        got.read().filled(np.nan), want[2:30:3, 1:].filled(np.nan), rtol=1e-12
+    )
+    std = clim.std()
+    zwant = want / np.ma.masked_where(std == 0, std)[months]
+    zgot = clim.standardized(LazyCube(data))[::-1]
+    np.testing.assert_allclose(
+        zgot.read().filled(np.nan), zwant[::-1].filled(np.nan), rtol=1e-12
+    )
+
+
+def test_seasons():
+    clim = Climatology.fromcube(LazyCube(stack()))
+    np.testing.assert_allclose(
+        clim.seasonal("DJF").filled(0), clim.mean[[11, 0, 1]].mean(0).filled(0)
+    )
+    np.testing.assert_allclose(
+        clim.annualrange().filled(0),
+        (clim.mean.max(0) - clim.mean.min(0)).filled(0),
+    )
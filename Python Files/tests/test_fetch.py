@@ -0,0 +1,73 @@
+import hashlib
+import http.server
+import os
+import threading
+from functools import partial
+
+import pytest
+
+from dsa5021.fetch import FetchError, grabfiles, readmanifest
+
+content = bytes(range(256)) * 100
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    served = tmp_path / "served"
+    served.mkdir()
+    (served / "data.bin").write_bytes(content)
+    httpd = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(Handler, directory=str(served))
+    )
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d/" % httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_truncated_file_is_fetched_again(server, tmp_path):
+    filedir = str(tmp_path / "data")
+    os.makedirs(filedir)
+    with open(os.path.join(filedir, "data.bin"), "wb") as f:
+        f.write(content[:1000])
+    assert grabfiles(server, ["data.bin"], filedir) == ["data.bin"]
+    with open(os.path.join(filedir, "data.bin"), "rb") as f:
+        assert f.read() == content
+    assert readmanifest(filedir)["data.bin"]["size"] == len(content)
+
+
+def test_good_file_is_kept(server, tmp_path):
+    filedir = str(tmp_path / "data")
+    os.makedirs(filedir)
+    with open(os.path.join(filedir, "data.bin"), "wb") as f:
+        f.write(content)
+    assert grabfiles(server, ["data.bin"], filedir) == []
+    entry = readmanifest(filedir)["data.bin"]
+    assert entry["sha256"] == hashlib.sha256(content).hexdigest()
+    # and from the manifest the next time
+    assert grabfiles(server, ["data.bin"], filedir) == []
+
+
+def test_good_file_is_kept_by_checksum(server, tmp_path):
+    filedir = str(tmp_path / "data")
+    os.makedirs(filedir)
+    with open(os.path.join(filedir, "data.bin"), "wb") as f:
+        f.write(content)
+    checksums = {"data.bin": hashlib.sha256(content).hexdigest()}
+    assert (
+        grabfiles("http://127.0.0.1:9/", ["data.bin"], filedir, checksums=checksums)
+        == []
+    )
+
+
+def test_checksum_mismatch_is_reported(server, tmp_path):
+    filedir = str(tmp_path / "data")
+    with pytest.raises(FetchError, match="sha256"):
+        grabfiles(server, ["data.bin"], filedir, checksums={"data.bin": "0" * 64})
+    assert os.listdir(filedir) == []
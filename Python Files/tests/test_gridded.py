@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from dsa5021.gridded import LazyCube, opengridded
+
+netCDF4 = pytest.importorskip("netCDF4")
+
+ntime, nlat, nlon = 14, 9, 12
+
+
+@pytest.fixture
+def ncpath(tmp_path):
+    rng = np.random.default_rng(1)
+    path = str(tmp_path / "tos.nc")
+    with netCDF4.Dataset(path, "w") as ds:
+        ds.createDimension("time", None)
+        ds.createDimension("lat", nlat)
+        ds.createDimension("lon", nlon)
+        ds.createVariable("time", "f8", ("time",))[:] = np.arange(ntime)
+        ds.createVariable("lat", "f8", ("lat",))[:] = -40.0 + 10.0 * np.arange(nlat)
+        ds.createVariable("lon", "f8", ("lon",))[:] = 15.0 + 30.0 * np.arange(nlon)
+        tos = ds.createVariable("tos", "f4", ("time", "lat", "lon"), fill_value=1e20)
+        data = 270.0 + 35.0 * rng.random((ntime, nlat, nlon))
+        land = rng.random((nlat, nlon)) < 0.3
+        tos[:] = np.ma.masked_where(np.broadcast_to(land, data.shape), data)
+    return path
+
+
+def eager(ncpath):
+    with netCDF4.Dataset(ncpath) as ds:
+        return ds.variables["tos"][:]
+
+
+def same(got, want):
+    got = np.ma.asarray(got)
+    assert got.shape == want.shape
+    assert got.dtype == want.dtype
+    np.testing.assert_array_equal(np.ma.getmaskarray(got), np.ma.getmaskarray(want))
+    np.testing.assert_array_equal(got.compressed(), np.ma.asarray(want).compressed())
+
+
+keys = [
+    0,
+    -1,
+    (3, -4),
+    (-2, slice(None), -4),
+    slice(2, 9),
+    slice(None, None, 3),
+    slice(-5, None),
+    slice(None, None, -1),
+    slice(10, 1, -3),
+    (slice(1, 12, 2), slice(-2, 2, -1), slice(None, None, -4)),
+    (Ellipsis, 4),
+    (2, Ellipsis),
+    (slice(None), 3, slice(1, -1)),
+    (-1, slice(None, None, -2), -5),
+    (slice(5, 5), 0),
+]
+
+
+@pytest.mark.parametrize("key", keys, ids=repr)
+def test_slicing_is_eager(ncpath, key):
+    want = eager(ncpath)[key]
+    with opengridded(ncpath) as g:
+        got = g.cube[key]
+        assert got.shape == want.shape
+        same(got.read(), want)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (slice(None, None, -1), slice(2, 8, 3)),
+        (slice(1, None, 2), (-1, slice(None, None, -1))),
+        ((Ellipsis, slice(3, None)), (slice(None, None, -2), 0)),
+    ],
+    ids=repr,
+)
+def test_views_of_views(ncpath, first, second):
+    want = eager(ncpath)[first][second]
+    with opengridded(ncpath) as g:
+        same(g.cube[first][second].read(), want)
+
+
+def test_point(ncpath):
+    want = eager(ncpath)
+    with opengridded(ncpath) as g:
+        for key in [(0, 0, 0), (-1, -1, -1), (7, 4, 6), (-2, -3, -4), (3, 4, -12)]:
+            got = g.cube[key]
+            if np.ma.is_masked(want[key]):
+                assert got is np.ma.masked
+            else:
+                assert got == want[key]
+
+
+@pytest.mark.parametrize("axis", [None, 0, 1, 2, -1])
+def test_reductions(ncpath, axis):
+    want = eager(ncpath).astype(np.float64)
+    with opengridded(ncpath, chunk=4) as g:
+        cube = g.cube[::-1, 1:]
+        w = want[::-1, 1:]
+        for name in ["sum", "mean", "min", "max"]:
+            got = getattr(cube, name)(axis=axis)
+            expect = getattr(w, name)(axis=axis)
+            if axis is None:
+                assert got == pytest.approx(expect)
+                continue
+            np.testing.assert_array_equal(
+                np.ma.getmaskarray(got), np.ma.getmaskarray(expect)
+            )
+            np.testing.assert_allclose(
+                np.ma.getdata(got)[~np.ma.getmaskarray(got)], expect.compressed()
+            )
+
+
+def test_array_source():
+    data = np.arange(6 * 7 * 8, dtype=np.float32).reshape(6, 7, 8)
+    cube = LazyCube(data)
+    for key in keys[:4] + [(slice(None, None, -1), slice(None, None, 2))]:
+        np.testing.assert_array_equal(np.asarray(cube[key]), data[key])
+
+
+def test_bad_keys(ncpath):
+    with opengridded(ncpath) as g:
+        with pytest.raises(IndexError):
+            g.cube[0, 0, 0, 0]
+        with pytest.raises(IndexError):
+            g.cube[ntime]
+        with pytest.raises(TypeError):
+            g.cube[[0, 1]]
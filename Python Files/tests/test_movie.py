@@ -0,0 +1,39 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from dsa5021.movie import animate, writeanimation
+
+lon1d = 1.0 + 2.0 * np.arange(20)
+lat1d = -9.0 + 2.0 * np.arange(10)
+cube = 270.0 + 35.0 * np.random.default_rng(0).random((3, 10, 20))
+
+needffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg is not on the PATH"
+)
+
+
+def test_gif(tmp_path):
+    from PIL import Image
+
+    outfile = animate(lon1d, lat1d, cube, str(tmp_path / "sst.gif"), dpi=20)
+    with Image.open(outfile) as im:
+        assert im.n_frames == 3
+
+
+@needffmpeg
+def test_mp4(tmp_path):
+    outfile = animate(lon1d, lat1d, cube, str(tmp_path / "sst.mp4"), dpi=20)
+    assert (tmp_path / "sst.mp4").stat().st_size > 0
+    assert outfile == str(tmp_path / "sst.mp4")
+
+
+@needffmpeg
+def test_mp4_frame_error_is_raised(tmp_path):
+    def images():
+        yield np.zeros((10, 20, 3), dtype=np.uint8)
+        raise ValueError("bad frame")
+
+    with pytest.raises(ValueError, match="bad frame"):
+        writeanimation(images(), str(tmp_path / "bad.mp4"))
@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+
+from conftest import datadir
+from dsa5021.colcache import loadverif
+from dsa5021.probskill import brierskill
+
+
+def test_brierskill_gives_the_notebook_numbers():
+    # ForecastProbabilitySkill.ipynb, 31011_DailyPoP1.csv, raintrigger=1
+    table = loadverif(os.path.join(datadir, "31011_DailyPoP1.csv"))
+    s = brierskill(table, raintrigger=1)
+    assert list(s["n"][:2]) == [340, 340]
+    assert "%5.2f" % s["bsc"][0] == " 0.22"
+    assert ["%5.2f" % x for x in s["bs"][:2]] == [" 0.13", " 0.15"]
+    assert ["%5.2f" % x for x in s["bss"][:2]] == [" 0.40", " 0.33"]
+    caption = "BS={:5.3f}   RELI={:5.3f}   RESO={:5.3f} UNC={:5.3f}   BSS={:5.3f}   Bias={:5.3f}"
+    assert caption.format(
+        s["bsa"][0], s["reli"][0], s["reso"][0], s["unc"][0], s["bss"][0], s["bias"][0]
+    ) == caption.format(0.134, 0.019, 0.109, 0.224, 0.397, 0.866)
+
+
+def test_common_all_leads_is_smaller():
+    table = loadverif(os.path.join(datadir, "31011_DailyPoP1.csv"))
+    s = brierskill(table, common=True)
+    assert s["n"][0] == 292
+    assert np.all(brierskill(table, common=False)["n"] >= brierskill(table)["n"])
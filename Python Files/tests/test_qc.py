@@ -0,0 +1,160 @@
+import numpy as np
+
+from dsa5021.qc import checks, clean, counts, qcstation, readobs
+
+DAY = 86400
+HOUR = 3600
+BASE = 1430438400  # 2015-05-01 00 UTC
+NDAY = 10
+
+
+def obline(t, value):
+    return "12038,WA,AIR_TEMP_MAX,%d,%d,%.1f,Celsius,max,false,SFC,60,%d,%d\n" % (
+        t,
+        t + HOUR,
+        value,
+        t,
+        t + HOUR,
+    )
+
+
+def fcstline(valid_start, base_time, value=25, span=15):
+    return "12038,WA,MaxT,%d,%d,%d,Celsius,max,false,SFC,%d\n" % (
+        valid_start,
+        valid_start + span * HOUR,
+        value,
+        base_time,
+    )
+
+
+hours = list(range(BASE, BASE + NDAY * DAY, HOUR))
+goodobs = [obline(t, 20.0 + (t // HOUR) % 24 * 0.5) for t in hours]
+goodfcst = [
+    fcstline(BASE + b * DAY + (22 + 24 * n) * HOUR, BASE + b * DAY, 20 + n)
+    for b in range(NDAY)
+    for n in range(7)
+]
+kvs = sorted(BASE + (22 + 24 * d) * HOUR for d in range(NDAY + 6))
+# the first and last six days do not have all seven leads, as in the files,
+# and the last six have no forecast from their own day
+edges = kvs[:6] + kvs[-6:]
+edgeflags = {"missing", "gaphours"}
+
+
+def report(obs=goodobs, fcst=goodfcst):
+    return qcstation("", "12038", "AIR_TEMP_MAX", obslines=obs, fcstlines=fcst)
+
+
+def flagged(r):
+    return {name for name, n in counts(r).items() if n}
+
+
+def test_good_data():
+    r = report()
+    assert r["spanx"] == 15 and r["starth"] == 22
+    assert r["obs"]["distinct"] == len(hours)
+    assert r["fcst"]["valid_starts"] == len(kvs)
+    assert r["fcst"]["missing"].tolist() == edges
+    assert r["fcst"]["gaphours"].tolist() == kvs[-6:]
+    assert flagged(r) == edgeflags
+    assert clean(r, [name for part, name in checks if name not in edgeflags])
+
+
+def test_readobs_keeps_the_lines():
+    obs = readobs(
+        goodobs + ["12038,WA,AIR_TEMP,%d,%d,1.0\n" % (BASE, BASE)], ["AIR_TEMP_MAX"]
+    )
+    valid_start, value, text = obs["AIR_TEMP_MAX"]
+    assert valid_start.tolist() == hours
+    assert text.tolist() == [line.strip() for line in goodobs]
+    assert value[:3].tolist() == [20.0, 20.5, 21.0]
+
+
+def test_readobs_missing_value():
+    line = goodobs[5].replace(",22.5,", ",,")
+    obs = readobs(goodobs[:5] + [line] + goodobs[6:], ["AIR_TEMP_MAX"])
+    valid_start, value, text = obs["AIR_TEMP_MAX"]
+    assert np.isnan(value[5]) and not np.isnan(np.delete(value, 5)).any()
+    assert text[5] == line.strip()
+
+
+def test_obs_duplicate_and_different():
+    t = hours[30]
+    obs = goodobs[:31] + [obline(t, 99.0), goodobs[30]] + goodobs[31:]
+    r = report(obs=obs)
+    assert r["obs"]["duplicate"].tolist() == [t]
+    assert r["obs"]["different"].tolist() == [t]
+    assert r["obs"]["distinct"] == len(hours)
+    assert flagged(r) == edgeflags | {"duplicate", "different"}
+
+
+def test_obs_timegap():
+    obs = goodobs[:40] + goodobs[43:]
+    r = report(obs=obs)
+    assert r["obs"]["timegap"].tolist() == [hours[43]]
+    assert r["obs"]["gap"].tolist() == [4 * HOUR]
+    assert flagged(r) == edgeflags | {"timegap"}
+
+
+def test_fcst_span():
+    kv = BASE + 3 * DAY + 22 * HOUR
+    fcst = [
+        (
+            fcstline(kv, BASE + 3 * DAY, 20, span=14)
+            if line == fcstline(kv, BASE + 3 * DAY, 20)
+            else line
+        )
+        for line in goodfcst
+    ]
+    r = report(fcst=fcst)
+    assert r["fcst"]["span"].tolist() == [kv]
+    assert flagged(r) == edgeflags | {"span"}
+
+
+def test_fcst_dst():
+    # an hour late, as with daylight saving time: a valid_start an hour
+    # after another, with no forecast at 22 UTC, and missing leads
+    late = BASE + 4 * DAY + 23 * HOUR
+    fcst = goodfcst + [fcstline(late, BASE + 4 * DAY)]
+    r = report(fcst=fcst)
+    assert r["fcst"]["dst"].tolist() == [late]
+    assert r["fcst"]["gaphours"].tolist() == sorted([late] + kvs[-6:])
+    assert late in r["fcst"]["missing"]
+    assert flagged(r) == edgeflags | {"dst"}
+
+
+def test_fcst_missing_lead():
+    kv = BASE + 8 * DAY + 22 * HOUR
+    fcst = [line for line in goodfcst if line != fcstline(kv, BASE + 5 * DAY, 23)]
+    assert len(fcst) == len(goodfcst) - 1
+    r = report(fcst=fcst)
+    assert r["fcst"]["missing"].tolist() == sorted(edges + [kv])
+    assert flagged(r) == edgeflags
+
+
+def test_fcst_timejump():
+    bt = BASE + 5 * DAY
+    fcst = [line for line in goodfcst if not line.endswith(",%d\n" % bt)]
+    r = report(fcst=fcst)
+    assert r["fcst"]["timejump"].tolist() == [bt + DAY]
+    assert r["fcst"]["jump"].tolist() == [2 * DAY]
+    assert flagged(r) == edgeflags | {"timejump"}
+
+
+def test_fcst_basehour():
+    bt = BASE + 7 * DAY
+    fcst = [line.replace(",%d\n" % bt, ",%d\n" % (bt + 12 * HOUR)) for line in goodfcst]
+    r = report(fcst=fcst)
+    assert r["fcst"]["basehour"].tolist() == [bt + 12 * HOUR]
+    # 36 hours after the one before
+    assert r["fcst"]["timejump"].tolist() == [bt + 12 * HOUR]
+    assert flagged(r) == edgeflags | {"basehour", "timejump"}
+
+
+def test_fcst_repeated():
+    fcst = goodfcst + goodfcst[10:13]
+    r = report(fcst=fcst)
+    assert r["fcst"]["repeated"] == 3
+    assert flagged(r) == edgeflags | {"repeated"}
+    assert not clean(r, ["repeated"])
+    assert clean(r, ["duplicate", "span"])
@@ -0,0 +1,114 @@
+import numpy as np
+
+from dsa5021.rawfcst import NA, ForecastIndex, readforecasts
+
+DAY = 86400
+BASE = 1430438400  # 2015-05-01 00 UTC
+pars = [("MaxT", 22, 15), ("MinT", 10, 15), ("DailyPoP1", 15, 24)]
+
+
+def fcstline(par, valid_start, span, value, base_time):
+    return "12038,WA,%s,%d,%d,%s,Celsius,x,false,SFC,%d\n" % (
+        par,
+        valid_start,
+        valid_start + span * 3600,
+        value,
+        base_time,
+    )
+
+
+def fcstvalue(p, b, n):
+    return "%.1f" % (20 + 10 * p + b + n / 10.0)
+
+
+lines = []
+for b in range(4):
+    bt = BASE + b * DAY
+    # the assimilation, valid before base_time, comes first, as in the files
+    lines.append(fcstline("DailyPoP1", bt - 9 * 3600, 24, 99, bt))
+    for p, (par, hour, span) in enumerate(pars):
+        for n in range(7):
+            if (b, p, n) == (2, 0, 3):
+                continue  # a missing forecast
+            lines.append(
+                fcstline(par, bt + (hour + 24 * n) * 3600, span, fcstvalue(p, b, n), bt)
+            )
+# a MaxT an hour early, as with daylight saving time
+lines.append(fcstline("MaxT", BASE + 2 * DAY + 45 * 3600, 15, 50, BASE + 2 * DAY))
+# a repeated line with another value: the first is kept
+lines.append(fcstline("MinT", BASE + DAY + 10 * 3600, 15, 70, BASE + DAY))
+
+
+def notebookedict(lines, lookforf, hour):
+    """f1 ... f7 of AustraliaVerificationData.ipynb, from fdict"""
+    fdict = {}
+    for line in lines:
+        q = line.strip().split(",")
+        if q[2] != lookforf:
+            continue
+        valid_start = int(q[3])
+        fhour = (valid_start - int(q[-1])) // 3600
+        fdict.setdefault(valid_start, {}).setdefault(fhour, float(q[5]))
+    kvs = sorted(fdict)
+    ff = [
+        [fdict[kv].get(hour + 24 * (fn - 1), np.nan) for fn in range(1, 8)]
+        for kv in kvs
+    ]
+    return kvs, np.array(ff)
+
+
+def test_gather_is_edict():
+    index = readforecasts(lines, [par for par, hour, span in pars])
+    for par, hour, span in pars:
+        kvs, ff = notebookedict(lines, par, hour)
+        got = index[par].gather(kvs, hour=hour)
+        np.testing.assert_array_equal(got, ff)
+
+
+def test_gather_values():
+    index = readforecasts(lines, ["MaxT"])["MaxT"]
+    kv = BASE + 3 * DAY + 22 * 3600
+    got = index.gather([kv], hour=22)[0]
+    # f1 from base day 3, f2 (lead 1) from base day 2, ...
+    np.testing.assert_array_equal(got, [23.0, 22.1, 21.2, 20.3, np.nan, np.nan, np.nan])
+    kv = BASE + 5 * DAY + 22 * 3600
+    assert np.isnan(index.gather([kv], hour=22)[0, 3])  # lead 3 of base day 2
+
+
+def test_early_hour_is_not_gathered():
+    index = readforecasts(lines, ["MaxT"])["MaxT"]
+    early = BASE + 3 * DAY + 21 * 3600
+    row = index.rows([early])[0]
+    assert row >= 0 and index.value[row, 1] == 50
+    assert np.isnan(index.gather([early], hour=22)).all()
+    assert index.gather([early])[0, 1] == 50
+
+
+def test_assimilation_is_dropped():
+    index = readforecasts(lines, ["DailyPoP1"])["DailyPoP1"]
+    assert (index.fhour[index.present] >= 0).all()
+    assert not (index.value == 99).any()
+    assert index.valid_start[0] == BASE + 15 * 3600
+
+
+def test_duplicates_keep_the_first():
+    index = readforecasts(lines, ["MinT"])["MinT"]
+    assert index.duplicates == 1
+    row = index.rows([BASE + DAY + 10 * 3600])[0]
+    assert index.value[row, 0] == float(fcstvalue(1, 1, 0))
+
+
+def test_missing_rows_and_cells():
+    index = readforecasts(lines, ["MaxT"])["MaxT"]
+    assert index.rows([BASE])[0] == -1
+    assert np.isnan(index.gather([BASE])).all()
+    assert index.span[index.present].tolist() == [15] * index.present.sum()
+    absent = ~index.present
+    assert (index.fhour[absent] == NA).all() and (index.base_time[absent] == NA).all()
+    assert np.isnan(index.value[absent]).all()
+
+
+def test_empty():
+    index = ForecastIndex.fromrecords("MaxT", [], [], [], [])
+    assert len(index) == 0
+    assert np.isnan(index.gather([BASE])).all()
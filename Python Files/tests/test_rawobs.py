@@ -0,0 +1,141 @@
+import pytest
+
+from dsa5021.rawobs import dailyarrays, dailyobs, obrecords
+
+DAY = 86400
+BASE = 1430438400  # 2015-05-01 00 UTC
+GAP = BASE + DAY + 5 * 3600  # an hour with no line, in the window of day 0
+
+
+def obline(par, t, value, stat="max"):
+    return "12038,WA,%s,%d,%d,%.1f,Celsius,%s,false,SFC,60,%d,%d\n" % (
+        par,
+        t,
+        t + 3600,
+        value,
+        stat,
+        t,
+        t + 3600,
+    )
+
+
+def hourly(par, value, stat="max"):
+    return [
+        obline(par, t, value(t), stat)
+        for t in range(BASE, BASE + 4 * DAY, 3600)
+        if t != GAP
+    ]
+
+
+def tmax(t):
+    # 10 C, plus half a degree an hour through the day, plus a degree a day
+    return 10.0 + 0.5 * ((t // 3600) % 24) + (t - BASE) // DAY
+
+
+obs = (
+    hourly("AIR_TEMP", tmax, "point")
+    + hourly("AIR_TEMP_MAX", tmax)
+    + hourly("PRCP", lambda t: 0.2 if (t // 3600) % 24 == 3 else 0.0, "total")
+)
+starts = [BASE + 22 * 3600 + d * DAY for d in range(4)]
+
+
+def notebookodict(lines, lookfor, kvs, spanx=15):
+    """odict of AustraliaVerificationData.ipynb, from obsx"""
+    obsx = {}
+    for line in lines:
+        q = line.strip().split(",")
+        if q[2] != lookfor:
+            continue
+        obsx.setdefault(int(q[3]), line)
+    odict = {}
+    for kv in kvs:
+        vals = [
+            float(obsx[h].strip().split(",")[5])
+            for h in [kv + n * 3600 for n in range(spanx)]
+            if h in obsx
+        ]
+        if len(vals) == spanx:
+            odict[kv] = max(vals) if "MAX" in lookfor else min(vals)
+    return odict
+
+
+def test_dailyobs_is_odict():
+    report = {}
+    odict = dict(dailyobs(obs, "AIR_TEMP_MAX", spanx=15, starth=22, report=report))
+    assert odict == notebookodict(obs, "AIR_TEMP_MAX", starts)
+    # 23 UTC of day 1 and of day 2: 10 + 11.5 + 1, 10 + 11.5 + 2
+    assert odict == {starts[1]: 22.5, starts[2]: 23.5}
+    assert report["distinct"] == 4 * 24 - 1
+    assert report["complete"] == 2
+
+
+def test_missing_hours():
+    # the missing hour, and the end of the file, leave their days out,
+    # to be NA in the exported CSV
+    report = {}
+    start, value = dailyarrays(obs, "AIR_TEMP_MAX", spanx=15, starth=22, report=report)
+    assert start.tolist() == [starts[1], starts[2]]
+    assert report["incomplete"] == [starts[0], starts[3]]
+
+
+def test_forecast_starts():
+    report = {}
+    odict = dict(dailyobs(obs, "AIR_TEMP_MAX", starts=starts[1:], report=report))
+    assert odict == notebookodict(obs, "AIR_TEMP_MAX", starts[1:])
+    assert report["incomplete"] == [starts[3]]
+
+
+def test_prcp_is_summed():
+    odict = dict(dailyobs(obs, "PRCP", spanx=24, starth=15))
+    assert sorted(odict) == [BASE + 15 * 3600 + d * DAY for d in (1, 2)]
+    assert all(v == pytest.approx(0.2) for v in odict.values())
+
+
+@pytest.mark.parametrize("missing", ["", "NA", "nan"])
+def test_missing_values(missing):
+    t = starts[1] + 3600
+    lines = [
+        (
+            line.replace(",%.1f," % tmax(t), ",%s," % missing)
+            if line.startswith("12038,WA,AIR_TEMP_MAX,%d," % t)
+            else line
+        )
+        for line in obs
+    ]
+    assert lines != obs
+    report = {}
+    odict = dict(dailyobs(lines, "AIR_TEMP_MAX", spanx=15, starth=22, report=report))
+    assert odict == {starts[2]: 23.5}
+    assert report["missing"] == 1
+    assert report["incomplete"] == [starts[0], starts[1], starts[3]]
+
+
+def test_duplicates():
+    t = BASE + 3600
+    lines = [
+        obline("AIR_TEMP_MAX", BASE, 12.0),
+        obline("AIR_TEMP_MAX", t, 13.0),
+        obline("AIR_TEMP_MAX", t, 13.0),
+        obline("AIR_TEMP_MAX", t, 14.0),
+        obline("AIR_TEMP_MAX", t + 3600, 15.0),
+    ]
+    report = {}
+    records = list(obrecords(lines, "AIR_TEMP_MAX", report))
+    # the first line for a valid_start is kept, as in obsx
+    assert records == [(BASE, 12.0), (t, 13.0), (t + 3600, 15.0)]
+    assert report == {"distinct": 3, "duplicate": 1, "different": 1, "missing": 0}
+
+
+def test_out_of_order():
+    lines = [
+        obline("AIR_TEMP_MAX", BASE + 3600, 1.0),
+        obline("AIR_TEMP_MAX", BASE, 2.0),
+    ]
+    with pytest.raises(ValueError):
+        list(obrecords(lines, "AIR_TEMP_MAX"))
+
+
+def test_needs_one_of_starth_or_starts():
+    with pytest.raises(ValueError):
+        list(dailyobs(obs, "AIR_TEMP_MAX"))
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+
+from dsa5021.gridded import LazyCube
+from dsa5021.regions import RegionIndex, boxes
+
+lat1d = -25.0 + 5.0 * np.arange(11)  # -25 ... 25
+lon1d = 5.0 + 10.0 * np.arange(36)  # 5 ... 355
+
+
+def cube(ntime=7, seed=3):
+    rng = np.random.default_rng(seed)
+    data = 20.0 + 10.0 * rng.random((ntime, len(lat1d), len(lon1d)))
+    mask = rng.random(data.shape) < 0.25
+    mask[4] = True  # a time step with nothing
+    return np.ma.masked_where(mask, data)
+
+
+def inbox(lat, lon, south, north, west, east):
+    if not south <= lat <= north:
+        return False
+    if east - west >= 360:
+        return True
+    return (lon - west) % 360 <= (east - west) % 360
+
+
+def brute(data, lat1d, lon1d, inside):
+    """cos(lat) weighted mean of each time step, one cell at a time"""
+    out = []
+    for field in data:
+        total = wsum = 0.0
+        for i, lat in enumerate(lat1d):
+            for j, lon in enumerate(lon1d):
+                if inside(i, j) and field[i, j] is not np.ma.masked:
+                    w = np.cos(np.radians(lat))
+                    total += w * field[i, j]
+                    wsum += w
+        out.append(total / wsum if wsum else np.nan)
+    return np.ma.masked_invalid(out)
+
+
+def close(got, want):
+    np.testing.assert_array_equal(np.ma.getmaskarray(got), np.ma.getmaskarray(want))
+    np.testing.assert_allclose(got.compressed(), want.compressed(), rtol=1e-12)
+
+
+tested = [
+    "nino34",
+    "nino3",
+    (-10, 10, 350, 20),  # across 0E
+    (-20, 0, 170, 200),  # across the dateline
+    (-25, 25, 0, 360),
+    (12, 14, 100, 120),  # no latitudes
+]
+
+
+@pytest.mark.parametrize("box", tested, ids=repr)
+def test_box_mean(box):
+    data = cube()
+    grid = RegionIndex(lat1d, lon1d)
+    bounds = grid.region(box)
+    south, north, west, east = boxes[box] if isinstance(box, str) else box
+    want = brute(
+        data,
+        lat1d,
+        lon1d,
+        lambda i, j: inbox(lat1d[i], lon1d[j], south, north, west, east),
+    )
+    close(grid.mean(data, box), want)
+    assert grid.region(box) is bounds  # kept
+
+
+def test_other_lon_convention():
+    # -180 ... 180, the same cells as 0 ... 360
+    data = cube()
+    order = np.argsort((lon1d + 180) % 360)
+    lon180 = (lon1d[order] + 180) % 360 - 180
+    grid = RegionIndex(lat1d, lon1d)
+    grid180 = RegionIndex(lat1d, lon180)
+    for box in [(-10, 10, 350, 20), (-10, 10, -10, 20), "nino34"]:
+        close(grid180.mean(data[:, :, order], box), grid.mean(data, box))
+
+
+def test_band_and_hovmoller():
+    data = cube()
+    grid = RegionIndex(lat1d, lon1d)
+    band = grid.band(-5, 5)
+    want = brute(data, lat1d, lon1d, lambda i, j: -5 <= lat1d[i] <= 5)
+    close(grid.mean(LazyCube(data, chunk=3), band), want)
+    hov = grid.hovmoller(data, band)
+    assert hov.shape == (len(data), len(lon1d))
+    for j in [0, 17, 35]:
+        close(
+            hov[:, j],
+            brute(data, lat1d, lon1d, lambda i, jj: jj == j and -5 <= lat1d[i] <= 5),
+        )
+    box = grid.box(-20, 20, 100, 140)
+    hov = grid.hovmoller(data, box, along="lat")
+    assert hov.shape == (len(data), 9)
+    close(
+        hov[:, 0],
+        brute(data, lat1d, lon1d, lambda i, j: i == 1 and 100 <= lon1d[j] <= 140),
+    )
+
+
+def test_mask_region():
+    data = cube()
+    rng = np.random.default_rng(4)
+    mask = rng.random((len(lat1d), len(lon1d))) < 0.3
+    grid = RegionIndex(lat1d, lon1d)
+    close(
+        grid.mean(data, grid.mask(mask, "basin")),
+        brute(data, lat1d, lon1d, lambda i, j: mask[i, j]),
+    )
+    assert grid.mask(mask, "basin") is grid.mask(mask, "basin")
+    with pytest.raises(ValueError):
+        grid.mask(mask[1:], "bad")
+
+
+def test_means_in_one_read():
+    data = cube()
+    grid = RegionIndex(lat1d, lon1d)
+    names = ["nino3", "nino34", "nino4", (-10, 10, 350, 20)]
+    together = grid.means(data, names)
+    for name in names:
+        close(together[name], grid.mean(data, name))
+
+
+def test_nino34_of_anomalies():
+    from dsa5021.climatology import Climatology
+
+    data = cube(24, seed=5)
+    clim = Climatology.fromcube(LazyCube(data))
+    anomaly = data - clim.mean[np.arange(24) % 12]
+    south, north, west, east = boxes["nino34"]
+    want = brute(
+        anomaly,
+        lat1d,
+        lon1d,
+        lambda i, j: inbox(lat1d[i], lon1d[j], south, north, west, east),
+    )
+    close(RegionIndex(lat1d, lon1d).nino34(LazyCube(data), clim), want)
@@ -0,0 +1,26 @@
+import os
+
+from conftest import datadir
+from dsa5021.colcache import loadverif
+from dsa5021.roc import rocskill
+
+
+def test_rocskill_gives_the_notebook_numbers():
+    # ForecastProbabilitySkill.ipynb section 5, f1 of 31011_DailyPoP1.csv
+    table = loadverif(os.path.join(datadir, "31011_DailyPoP1.csv"))
+    curve = rocskill(table, raintrigger=1)[0]
+    assert "%5.4f" % curve["auc"] == "0.8991"
+    maxrv = ["%5.3f" % x for x in curve["rv"].max(axis=1)]
+    assert maxrv == [
+        "-0.000",
+        "0.249",
+        "0.511",
+        "0.612",
+        "0.674",
+        "0.533",
+        "0.338",
+        "0.195",
+        "0.109",
+        "0.035",
+        "-0.000",
+    ]
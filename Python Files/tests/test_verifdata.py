@@ -0,0 +1,32 @@
+import glob
+import os
+import shutil
+
+import pytest
+
+from conftest import datadir
+from dsa5021.colcache import loadverif
+from dsa5021.verifdata import readverif, writeverif
+
+csvfiles = sorted(glob.glob(os.path.join(datadir, "*_*.csv")))
+
+
+@pytest.mark.parametrize("path", csvfiles, ids=os.path.basename)
+def test_round_trip_is_byte_identical(path, tmp_path):
+    # temperature and PoP layouts, with and without a space after utc
+    out = str(tmp_path / os.path.basename(path))
+    writeverif(out, readverif(path))
+    with open(out) as a, open(path) as b:
+        assert a.read() == b.read()
+
+
+def test_round_trip_through_the_cache(tmp_path):
+    for name in ["09021_AIR_TEMP_MAX.csv", "31011_AIR_TEMP_MIN.csv"]:
+        path = str(tmp_path / name)
+        shutil.copy(os.path.join(datadir, name), path)
+        loadverif(path)  # writes the cache
+        table = loadverif(path)  # reads it
+        out = str(tmp_path / ("out_" + name))
+        writeverif(out, table)
+        with open(out) as a, open(path) as b:
+            assert a.read() == b.read()